@@ -1,56 +1,326 @@
 # app.py
-from flask import Flask, render_template, request, send_file, session
+from flask import Flask, Response, g, jsonify, render_template, request, session, stream_with_context, url_for
+import io
+import json
 import os
 import re
 import tempfile
+import threading
+import time
 
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import click
 from dotenv import load_dotenv
-import google.generativeai as genai
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 
+from utils import pdf_reader
+from utils.admission import ConcurrencyLimiter, RateLimiter, Rejected
 from utils.pdf_reader import extract_text_from_pdf
 from utils.docx_reader import extract_text_from_docx
+from utils.gemini_client import CircuitBreaker, GeminiClient
 from utils.alignment import alignment_facts
-from utils.pdf_writer import write_resume_pdf
-from utils.docx_writer import write_resume_docx
+from utils.jd_corpus import JDCorpus
+from utils.jobs import JobQueue
+from utils.llm_cache import TailorCache
+from utils.metrics import SIZE_BUCKETS, Metrics
+from utils.output_cleaner import StreamingCleaner, clean_output
+from utils import renderer
+from utils.profiler import SamplingProfiler
+from utils.prompt import PROMPT_VERSION, prepare_prompt
+from utils.templates import DEFAULT_TEMPLATE, PDF_TEMPLATES
+from utils.result_store import make_result_store, new_result_id
+from utils.sections import SectionTailor, has_sections
+from utils.text_analysis import analyze
+from utils.upload import IngestedUpload, UploadError, ingest_upload
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")  # change later
 
+# Reverse proxies in front of the app. With N > 0 the client address (and
+# scheme) come from the last N X-Forwarded-For/-Proto entries, so rate limits
+# are per user rather than per proxy. Only set this behind proxies you run:
+# a client can forge any header the proxies don't overwrite.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=TRUSTED_PROXY_HOPS)
+
+# Uploads: hard cap per file, spooled to disk past the threshold. Werkzeug rejects
+# whole request bodies past MAX_CONTENT_LENGTH (file + JD fields) before parsing.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("REQUEST_MAX_BYTES", str(UPLOAD_MAX_BYTES + 2 * 1024 * 1024)))
+
 # Gemini
 API_KEY = os.getenv("GOOGLE_API_KEY")
 if not API_KEY:
     raise RuntimeError("GOOGLE_API_KEY missing. Put it in .env as GOOGLE_API_KEY=...")
 
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("models/gemini-flash-latest")
+MODEL_NAME = "models/gemini-flash-latest"
+# Point at another generateContent endpoint (e.g. a local fake for load tests); REST transport is used then.
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "rest" if GEMINI_API_ENDPOINT else None)
+
+# Created per process by get_model(); tests and benchmarks may assign a stand-in here.
+model = None
+_model_pid = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    This process's Gemini client, built on first use. google.generativeai
+    (grpc + protobuf) is imported here rather than at boot, and a client made
+    before a fork (e.g. in a --preload master) is never reused by the workers:
+    grpc channels don't survive fork, so each worker builds its own.
+    """
+    global model, _model_pid
+    if model is not None and _model_pid in (None, os.getpid()):
+        return model
+    with _model_lock:
+        if model is None or (_model_pid is not None and _model_pid != os.getpid()):
+            import google.generativeai as genai
+
+            genai.configure(
+                api_key=API_KEY,
+                transport=GEMINI_TRANSPORT,
+                client_options={"api_endpoint": GEMINI_API_ENDPOINT} if GEMINI_API_ENDPOINT else None,
+            )
+            model = genai.GenerativeModel(MODEL_NAME)
+            _model_pid = os.getpid()
+        return model
+
+
+# Generation cache (memory per worker + SQLite shared by all workers)
+tailor_cache = TailorCache(
+    path=os.getenv("TAILOR_CACHE_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_cache.sqlite3")),
+    version=f"{PROMPT_VERSION}:{MODEL_NAME}",
+    maxsize=int(os.getenv("TAILOR_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("TAILOR_CACHE_TTL", "3600")),
+    disk_ttl=int(os.getenv("TAILOR_CACHE_DISK_TTL", str(7 * 86400))),
+)
+
+# Rendered PDF/DOCX bytes kept per worker, keyed by (output hash, template, format)
+renderer.configure_cache(
+    max_bytes=int(os.getenv("RENDER_CACHE_BYTES", str(64 * 1024 * 1024))),
+    ttl=int(os.getenv("RENDER_CACHE_TTL", "600")),
+    prerender_workers=int(os.getenv("PRERENDER_WORKERS", "2")),
+    bundle_workers=int(os.getenv("BUNDLE_WORKERS", "4")),
+)
+# Opt-in: render both formats right after tailoring, ahead of the download click
+PRERENDER = os.getenv("PRERENDER", "0") == "1"
+
+# Tailored outputs for the download routes; the session cookie holds only the id
+results = make_result_store(
+    backend=os.getenv("RESULT_STORE", "sqlite"),
+    path=os.getenv("RESULT_STORE_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_results.sqlite3")),
+    ttl=int(os.getenv("RESULT_TTL", "86400")),
+    max_items=int(os.getenv("RESULT_MAX_ITEMS", "10000")),
+    max_bytes=int(os.getenv("RESULT_MAX_BYTES", str(200 * 1024 * 1024))),
+)
+
+
+# PDF extraction budgets + process pool for long documents
+pdf_reader.configure(
+    max_pages=int(os.getenv("PDF_MAX_PAGES", "50")),
+    max_chars=int(os.getenv("PDF_MAX_CHARS", "200000")),
+    parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8")),
+    workers=int(os.getenv("PDF_WORKERS", "4")),
+    cache_size=int(os.getenv("PDF_CACHE_SIZE", "256")),
+)
+
+# Per-stage timings (Server-Timing header) and Prometheus metrics summed over all workers
+metrics = Metrics(
+    path=os.getenv("METRICS_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_metrics.sqlite3")),
+    flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0")),
+    prefix="magnetic_resume_",
+)
+metrics.histogram("http_request_seconds", "Request latency by route, method and status.")
+metrics.histogram("stage_seconds", "Time spent in each pipeline stage.")
+metrics.histogram("gemini_latency_seconds", "Gemini call latency, request to last token.")
+metrics.histogram("gemini_ttft_seconds", "Gemini time to first token.")
+metrics.histogram("gemini_prompt_chars", "Prompt size sent to Gemini.", buckets=SIZE_BUCKETS)
+metrics.histogram("gemini_response_chars", "Response size received from Gemini.", buckets=SIZE_BUCKETS)
+metrics.counter("gemini_errors_total", "Failed Gemini calls by exception type.")
+metrics.histogram("prompt_tokens", "Estimated prompt tokens before (raw) and after (compacted) compaction.", buckets=SIZE_BUCKETS)
+metrics.counter("gemini_events_total", "Gemini client retries, circuit-breaker refusals, coalesced calls and deadlines.")
+metrics.counter("tailor_sections_total", "Sections in section mode by outcome (hit, miss, kept).")
+metrics.histogram("tailor_section_seconds", "Per-section time in section mode (cache lookup plus generation).")
+metrics.counter("admission_total", "Admission decisions for the tailoring routes (admitted, queued, busy, wait_timeout, rate_limited).")
+metrics.histogram("admission_wait_seconds", "Time admitted requests spent waiting for an in-flight slot.")
+
+# Deadlines, retries with backoff, circuit breaker and coalescing of identical prompts
+gemini = GeminiClient(
+    model_factory=get_model,
+    timeout=float(os.getenv("GEMINI_TIMEOUT", "60")),
+    deadline=float(os.getenv("GEMINI_DEADLINE", "120")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+    backoff_base=float(os.getenv("GEMINI_BACKOFF_BASE", "0.5")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+    ),
+    on_event=lambda event: metrics.inc("gemini_events_total", event=event),
+)
+
+# Admission control for the Gemini-backed POST routes, shared by all workers:
+# at most ADMISSION_MAX_INFLIGHT at once plus a short line of ADMISSION_MAX_WAITING
+# (waiting up to ADMISSION_MAX_WAIT seconds), and a token bucket per client
+# (remote address, see TRUSTED_PROXY_HOPS). Over the limit: 503 / 429 with
+# Retry-After. Page loads and downloads never go through it. 0 disables a limit.
+# A waiting request holds a gunicorn worker, so keep the line short and the
+# wait brief: ADMISSION_MAX_WAITING well under the worker count.
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "20"))
+ADMITTED_ENDPOINTS = {"index", "stream"}    # hold an in-flight slot (POST only)
+RATE_LIMITED_ENDPOINTS = ADMITTED_ENDPOINTS | {"submit_job", "batch"}
+
+admission = None
+if ADMISSION_MAX_INFLIGHT > 0:
+    admission = ConcurrencyLimiter(
+        directory=os.getenv("ADMISSION_DIR", os.path.join(tempfile.gettempdir(), "magnetic_resume_admission")),
+        max_inflight=ADMISSION_MAX_INFLIGHT,
+        max_waiting=int(os.getenv("ADMISSION_MAX_WAITING", "2")),
+        max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "1")),
+    )
+rate_limiter = None
+if RATE_LIMIT_PER_MINUTE > 0:
+    rate_limiter = RateLimiter(
+        path=os.getenv("RATE_LIMIT_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_ratelimit.sqlite3")),
+        per_minute=RATE_LIMIT_PER_MINUTE,
+        burst=int(os.getenv("RATE_LIMIT_BURST", "10")),
+    )
 
+# Opt-in section mode: rewrite the resume section by section, caching each one, so
+# edits to the resume or JD only regenerate the sections they touch. Up to
+# SECTION_WORKERS sections are generated at once (per worker process); resumes
+# shorter than TAILOR_SECTIONS_MIN_CHARS use a single call.
+TAILOR_SECTIONS = os.getenv("TAILOR_SECTIONS", "0") == "1"
+TAILOR_SECTIONS_MIN_CHARS = int(os.getenv("TAILOR_SECTIONS_MIN_CHARS", "1500"))
 
-def extract_resume_text(file_storage):
-    name = (file_storage.filename or "").lower()
-    if name.endswith(".pdf"):
-        return extract_text_from_pdf(file_storage)
-    if name.endswith(".docx"):
-        return extract_text_from_docx(file_storage)
-    raise ValueError("Unsupported file type. Upload PDF or DOCX.")
 
+def record_section(section, outcome: str, seconds: float):
+    metrics.inc("tailor_sections_total", outcome=outcome)
+    if outcome != "kept":
+        metrics.timing(f"section-{section.kind}", seconds, histogram="tailor_section_seconds")
 
-def clean_output(text: str) -> str:
-    """Strong cleanup: remove markdown, tables, stray symbols."""
-    if not text:
-        return ""
 
-    text = re.sub(r"^\s{0,3}#{1,6}\s*", "", text, flags=re.MULTILINE)  # headings
-    text = text.replace("**", "").replace("__", "").replace("`", "")
-    text = re.sub(r"^\s*\|.*\|\s*$", "", text, flags=re.MULTILINE)  # remove table rows
+section_tailor = SectionTailor(
+    cache=tailor_cache,
+    generate=lambda prompt: gemini_generate(prompt),  # defined below
+    jd_token_budget=int(os.getenv("SECTION_JD_TOKEN_BUDGET", "600")),
+    max_workers=int(os.getenv("SECTION_WORKERS", "4")),
+    on_section=record_section,
+)
 
-    # bullets -> hyphen
-    text = re.sub(r"^\s*[•*]\s+", "- ", text, flags=re.MULTILINE)
+# Opt-in sampling profiler: ?profile=1 (or X-Profile: 1) writes a folded-stack file per request
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "magnetic_resume_profiles"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
 
-    # collapse extra blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text
+
+def ingest(file_storage) -> IngestedUpload:
+    """Size-capped, type-sniffed, hashed copy of an upload (raises UploadError)."""
+    return ingest_upload(file_storage, max_bytes=UPLOAD_MAX_BYTES, spool_threshold=UPLOAD_SPOOL_BYTES)
+
+
+def extract_resume_text(file_storage):
+    with metrics.stage("extract"), ingest(file_storage) as upload:
+        if upload.kind == "pdf":
+            return extract_text_from_pdf(upload.stream, content_hash=upload.sha256)
+        return extract_text_from_docx(upload.stream, content_hash=upload.sha256)
+
+
+def gemini_generate(prompt: str) -> str:
+    """One blocking Gemini call, with latency, sizes and errors recorded."""
+    metrics.observe("gemini_prompt_chars", len(prompt), mode="sync")
+    start = time.perf_counter()
+    try:
+        with metrics.stage("gemini"):
+            raw = gemini.generate(prompt)
+    except Exception as e:
+        metrics.inc("gemini_errors_total", mode="sync", error=type(e).__name__)
+        raise
+    elapsed = time.perf_counter() - start
+    # a blocking call gets the whole answer at once: first token == last token
+    metrics.observe("gemini_ttft_seconds", elapsed, mode="sync")
+    metrics.observe("gemini_latency_seconds", elapsed, mode="sync")
+    metrics.observe("gemini_response_chars", len(raw), mode="sync")
+    return raw
+
+
+def gemini_stream(prompt: str):
+    """Yield Gemini text chunks, recording time to first token and total latency."""
+    metrics.observe("gemini_prompt_chars", len(prompt), mode="stream")
+    start = time.perf_counter()
+    size = 0
+    first = True
+    try:
+        for text in gemini.stream(prompt):
+            if first:
+                metrics.observe("gemini_ttft_seconds", time.perf_counter() - start, mode="stream")
+                first = False
+            size += len(text)
+            yield text
+    except Exception as e:
+        metrics.inc("gemini_errors_total", mode="stream", error=type(e).__name__)
+        raise
+    metrics.observe("gemini_latency_seconds", time.perf_counter() - start, mode="stream")
+    metrics.observe("gemini_response_chars", size, mode="stream")
+
+
+def build_tailor_prompt(resume_text: str, jd_text: str) -> str:
+    """Compacted prompt (normalized text, JD boilerplate and repeats dropped, JD token budget)."""
+    with metrics.stage("prompt"):
+        prompt, report = prepare_prompt(resume_text, jd_text)
+    metrics.observe("prompt_tokens", report["tokens_before"], stage="raw")
+    metrics.observe("prompt_tokens", report["tokens_after"], stage="compacted")
+    return prompt
+
+
+def use_sections(resume_text: str) -> bool:
+    """Section mode is on and worth it: a short resume is faster as one call than as several."""
+    return TAILOR_SECTIONS and len(resume_text or "") >= TAILOR_SECTIONS_MIN_CHARS and has_sections(resume_text)
+
+
+def generate_tailored_resume(resume_text: str, jd_text: str) -> str:
+    """Call Gemini for a tailored resume, reusing a cached generation when the inputs match."""
+    if use_sections(resume_text):
+        with metrics.stage("sections"):  # end to end; per-section times are in tailor_section_seconds
+            raw = section_tailor.tailor(resume_text, jd_text)
+        with metrics.stage("clean"):
+            return clean_output(raw)
+
+    key = tailor_cache.key(resume_text, jd_text)
+    raw = tailor_cache.get(key)
+    if raw is None:
+        raw = gemini_generate(build_tailor_prompt(resume_text, jd_text))
+        tailor_cache.set(key, raw)
+    with metrics.stage("clean"):
+        return clean_output(raw)
+
+
+def stream_tailored_resume(resume_text: str, jd_text: str):
+    """Yield raw Gemini text chunks as they arrive (one chunk on a cache hit, one per section in section mode)."""
+    if use_sections(resume_text):
+        yield from section_tailor.iter_sections(resume_text, jd_text)
+        return
+
+    key = tailor_cache.key(resume_text, jd_text)
+    raw = tailor_cache.get(key)
+    if raw is not None:
+        yield raw
+        return
+
+    parts = []
+    for text in gemini_stream(build_tailor_prompt(resume_text, jd_text)):
+        parts.append(text)
+        yield text
+    tailor_cache.set(key, "".join(parts))
 
 
 def confidence_label(delta: int) -> str:
@@ -67,71 +337,192 @@ def safe_filename(base: str) -> str:
     return base[:40] or "guest"
 
 
-@app.route("/", methods=["GET", "POST"])
-def index():
-    output = None
-    before_score = after_score = delta = None
-    confidence = None
+def read_tailor_form():
+    """Pull the tailoring inputs out of the POSTed form: (jd_text, resume_file, name_slug, template, error)."""
+    jd_text = (request.form.get("jd") or "").strip()
+    resume_file = request.files.get("resume_file")
+
+    display_name = (request.form.get("display_name") or "").strip()
+    name_slug = safe_filename(display_name) if display_name else "guest"
+
+    template = request.form.get("template", "ATS_CLASSIC")
+    if template not in PDF_TEMPLATES:
+        template = DEFAULT_TEMPLATE
+
     error = None
+    if not jd_text:
+        error = "Please paste the Job Description."
+    elif not resume_file or not resume_file.filename:
+        error = "Please upload a PDF or DOCX resume."
+    return jd_text, resume_file, name_slug, template, error
+
+
+def tailor(resume_text: str, jd_text: str) -> dict:
+    """Score, generate and re-score one resume/JD pair."""
+    with metrics.stage("score"):
+        jd = analyze(jd_text)  # analyzed once, shared by the before and after scores
+        before_alignment = alignment_facts(resume_text, jd)
+    output = generate_tailored_resume(resume_text, jd_text)
+    with metrics.stage("score"):
+        after_alignment = alignment_facts(output, jd)
+
+    delta = after_alignment["score"] - before_alignment["score"]
+    return {
+        "output": output,
+        "before_score": before_alignment["score"],
+        "after_score": after_alignment["score"],
+        "delta": delta,
+        "confidence": confidence_label(delta),
+        "before_alignment": before_alignment,
+        "after_alignment": after_alignment,
+    }
+
+
+def store_output(output: str, name_slug: str, template: str, result_id: str = None) -> str:
+    # store for download routes
+    return results.put({"output": output, "name_slug": name_slug, "template": template}, result_id=result_id)
+
+
+def maybe_prerender(output: str, template: str):
+    if PRERENDER and output:
+        renderer.prerender(output, template)
+
+
+def remember_output(result_id: str):
+    """The session cookie carries only the result id (older cookies may still hold the full text)."""
+    for legacy in ("last_output", "name_slug", "template"):
+        session.pop(legacy, None)
+    session["result_id"] = result_id
+
+
+def load_result():
+    """Result the download routes should render: ?id=... (batch items) or the session's latest."""
+    result_id = request.args.get("id") or session.get("result_id")
+    return results.get(result_id) if result_id else None
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    g.timing_token = metrics.start_request()
+    g.profiler = None
+    if PROFILE_REQUESTS and "1" in (request.args.get("profile"), request.headers.get("X-Profile")):
+        g.profiler = SamplingProfiler(interval=PROFILE_INTERVAL).start()
+
+
+@app.after_request
+def finish_request_timing(response):
+    if "request_start" not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    timings = metrics.end_request(g.timing_token) + [("total", elapsed)]
+    # streamed bodies (SSE) are produced after this point; their header covers setup only
+    response.headers["Server-Timing"] = metrics.server_timing(timings)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe("http_request_seconds", elapsed, route=route, method=request.method, status=response.status_code)
+
+    if g.profiler is not None:
+        g.profiler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{request.endpoint or 'unmatched'}.folded"
+        g.profiler.write(os.path.join(PROFILE_DIR, name))
+        response.headers["X-Profile-File"] = name
+
+    metrics.maybe_flush()
+    return response
+
+
+def client_key() -> str:
+    """
+    Rate-limit key: the client's address (resolved through TRUSTED_PROXY_HOPS).
+    Not the session: a client can drop its cookie (or never send one) and get
+    a fresh bucket on every request.
+    """
+    return f"ip:{request.remote_addr}"
+
+
+@app.before_request
+def admit_request():
+    g.admission_slot = None
+    if request.method != "POST" or request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+
+    route = request.url_rule.rule
+    try:
+        if rate_limiter is not None:
+            rate_limiter.take(client_key())
+        if admission is not None and request.endpoint in ADMITTED_ENDPOINTS:
+            g.admission_slot, waited = admission.acquire()
+            metrics.inc("admission_total", route=route, outcome="queued" if waited else "admitted")
+            metrics.observe("admission_wait_seconds", waited, route=route)
+    except Rejected as e:
+        metrics.inc("admission_total", route=route, outcome=e.reason)
+        if request.endpoint == "index":
+            response = app.make_response((render_template("index.html", error=str(e)), e.status))
+        else:
+            response = app.make_response((jsonify({"error": str(e)}), e.status))
+        response.headers["Retry-After"] = e.retry_after_header
+        return response
+    return None
 
-    if request.method == "POST":
-        jd_text = (request.form.get("jd") or "").strip()
-        resume_file = request.files.get("resume_file")
 
-        display_name = (request.form.get("display_name") or "").strip()
-        name_slug = safe_filename(display_name) if display_name else "guest"
+@app.teardown_request
+def release_admission_slot(exc):
+    # streamed responses (stream_with_context) get here once the stream is done
+    slot = g.pop("admission_slot", None)
+    if slot is not None:
+        slot.release()
 
-        template = request.form.get("template", "ATS_CLASSIC")  # <-- NEW
-        if template not in ("ATS_CLASSIC", "ATS_BLUE"):
-            template = "ATS_CLASSIC"
 
-        if not jd_text:
-            error = "Please paste the Job Description."
-        elif not resume_file or not resume_file.filename:
-            error = "Please upload a PDF or DOCX resume."
-        else:
-            try:
-                resume_text = extract_resume_text(resume_file)
+@app.route("/admission/stats")
+def admission_stats():
+    stats = admission.stats() if admission is not None else {"max_inflight": 0}
+    stats["rate_limit_per_minute"] = RATE_LIMIT_PER_MINUTE
+    stats["rate_limit_burst"] = rate_limiter.burst if rate_limiter is not None else 0
+    return jsonify(stats)
 
-                before_alignment = alignment_facts(resume_text, jd_text)
-                before_score = before_alignment["score"]
 
-                prompt = f"""
-You are a resume enhancer.
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-STRICT RULES:
-- Do NOT add fake experience
-- Do NOT add new companies, tools, skills, certifications
-- Do NOT change dates, titles, locations
-- Output must be PLAIN TEXT ONLY (no markdown, no **, no ##, no tables)
 
-FORMATTING RULES:
-- Use ALL CAPS for section titles (SUMMARY, EXPERIENCE, EDUCATION, SKILLS, CERTIFICATIONS)
-- Use hyphen (-) for bullets
-- One blank line between sections
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    error = f"Upload too large (limit is {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB)."
+    if request.path == "/":
+        return render_template("index.html", error=error), 413
+    return jsonify({"error": error}), 413
 
-RESUME:
-{resume_text}
 
-JOB DESCRIPTION:
-{jd_text}
+@app.route("/", methods=["GET", "POST"])
+def index():
+    output = None
+    before_score = after_score = delta = None
+    confidence = None
+    error = None
 
-TASK:
-Rewrite the resume to better align to the job description while staying truthful.
-"""
-                response = model.generate_content(prompt)
-                output = clean_output(response.text or "")
+    if request.method == "POST":
+        jd_text, resume_file, name_slug, template, error = read_tailor_form()
 
-                after_alignment = alignment_facts(output, jd_text)
-                after_score = after_alignment["score"]
+        if not error:
+            try:
+                resume_text = extract_resume_text(resume_file)
+                result = tailor(resume_text, jd_text)
 
-                delta = after_score - before_score
-                confidence = confidence_label(delta)
+                output = result["output"]
+                before_score = result["before_score"]
+                after_score = result["after_score"]
+                delta = result["delta"]
+                confidence = result["confidence"]
 
-                # store for download routes
-                session["last_output"] = output
-                session["name_slug"] = name_slug
-                session["template"] = template  # <-- NEW
+                with metrics.stage("store"):
+                    remember_output(store_output(output, name_slug, template))
+                maybe_prerender(output, template)
 
             except Exception as e:
                 error = f"Error: {str(e)}"
@@ -147,44 +538,444 @@ Rewrite the resume to better align to the job description while staying truthful
     )
 
 
-@app.route("/download/pdf")
-def download_pdf():
-    text = session.get("last_output")
-    if not text:
+@app.route("/stream", methods=["POST"])
+def stream():
+    """
+    Same pipeline as index(), but streamed as Server-Sent Events:
+    - start: before score
+    - chunk: cleaned text as it is generated
+    - done: final output, before/after score and confidence
+    - error: message (stream ends)
+    """
+    jd_text, resume_file, name_slug, template, error = read_tailor_form()
+    if error:
+        return jsonify({"error": error}), 400
+    try:
+        resume_text = extract_resume_text(resume_file)
+    except Exception as e:
+        return jsonify({"error": f"Error: {str(e)}"}), 400
+
+    # The cookie goes out with the response headers, before any text exists,
+    # so reserve the result id now and fill it in once generation finishes.
+    result_id = new_result_id()
+    remember_output(result_id)
+
+    def events():
+        try:
+            with metrics.stage("score"):
+                jd = analyze(jd_text)
+                before_alignment = alignment_facts(resume_text, jd)
+            yield sse("start", {"before_score": before_alignment["score"]})
+
+            cleaner = StreamingCleaner()
+            pieces = []
+            for chunk in stream_tailored_resume(resume_text, jd_text):
+                text = cleaner.feed(chunk)
+                if text:
+                    pieces.append(text)
+                    yield sse("chunk", {"text": text})
+            text = cleaner.finish()
+            if text:
+                pieces.append(text)
+                yield sse("chunk", {"text": text})
+
+            output = "".join(pieces)
+            store_output(output, name_slug, template, result_id=result_id)
+            maybe_prerender(output, template)
+            with metrics.stage("score"):
+                after_alignment = alignment_facts(output, jd)
+            delta = after_alignment["score"] - before_alignment["score"]
+            yield sse("done", {
+                "output": output,
+                "before_score": before_alignment["score"],
+                "after_score": after_alignment["score"],
+                "delta": delta,
+                "confidence": confidence_label(delta),
+            })
+        except Exception as e:
+            yield sse("error", {"error": f"Error: {str(e)}"})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# /batch runs as a job (see run_batch_job): up to BATCH_MAX_JDS JDs, BATCH_CONCURRENCY
+# Gemini calls at a time; JDs still running near JOB_TIMEOUT come back as errors.
+BATCH_MAX_JDS = int(os.getenv("BATCH_MAX_JDS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+def read_batch_jds():
+    """JDs come as repeated `jd` form fields or as a JSON list in `jds`."""
+    jds = [j.strip() for j in request.form.getlist("jd")]
+    if request.form.get("jds"):
+        try:
+            extra = json.loads(request.form["jds"])
+        except ValueError:
+            raise ValueError("`jds` must be a JSON list of strings.")
+        if not isinstance(extra, list) or not all(isinstance(j, str) for j in extra):
+            raise ValueError("`jds` must be a JSON list of strings.")
+        jds.extend(j.strip() for j in extra)
+    return [j for j in jds if j]
+
+
+@app.route("/batch", methods=["POST"])
+def batch():
+    """
+    Tailor one resume against many JDs. A batch runs far longer than a worker
+    may hold a request, so it is queued as a job: 202 with the job id, and
+    GET /jobs/<id>/result returns the items once it is done.
+    """
+    resume_file = request.files.get("resume_file")
+    if not resume_file or not resume_file.filename:
+        return jsonify({"error": "Please upload a PDF or DOCX resume."}), 400
+    try:
+        jds = read_batch_jds()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not jds:
+        return jsonify({"error": "Please provide at least one Job Description."}), 400
+    if len(jds) > BATCH_MAX_JDS:
+        return jsonify({"error": f"Too many Job Descriptions (max {BATCH_MAX_JDS})."}), 400
+
+    display_name = (request.form.get("display_name") or "").strip()
+    name_slug = safe_filename(display_name) if display_name else "guest"
+    template = request.form.get("template", "ATS_CLASSIC")
+    if template not in PDF_TEMPLATES:
+        template = DEFAULT_TEMPLATE
+
+    try:
+        with ingest(resume_file) as upload:
+            blob = upload.read()
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    payload = {"kind": "batch", "jds": jds, "filename": resume_file.filename, "name_slug": name_slug, "template": template}
+    return job_accepted(jobs.submit(payload, blob))
+
+
+def tailor_batch(resume_text: str, jds: list, name_slug: str, template: str, budget: float) -> dict:
+    """
+    Tailor resume_text against each JD; the resume is tokenized (and its prompt
+    text compacted) once. Gemini calls fan out over at most BATCH_CONCURRENCY
+    threads. JDs not finished within `budget` seconds are reported as errors;
+    their generations keep running and land in the tailor cache, so a
+    resubmitted batch picks them up. Items are sorted by score delta.
+    """
+    resume = analyze(resume_text)
+
+    def run_one(i, jd_text):
+        item = {"index": i, "jd_preview": jd_text[:120]}
+        try:
+            jd = analyze(jd_text)
+            before_alignment = alignment_facts(resume, jd)
+            output = generate_tailored_resume(resume_text, jd_text)
+            after_alignment = alignment_facts(output, jd)
+
+            delta = after_alignment["score"] - before_alignment["score"]
+            result_id = store_output(output, name_slug, template)
+            item.update(
+                result_id=result_id,
+                output=output,
+                before_score=before_alignment["score"],
+                after_score=after_alignment["score"],
+                delta=delta,
+                confidence=confidence_label(delta),
+                before_alignment=before_alignment,
+                after_alignment=after_alignment,
+            )
+        except Exception as e:
+            item["error"] = f"Error: {str(e)}"
+        return item
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(BATCH_CONCURRENCY, len(jds))), thread_name_prefix="batch")
+    try:
+        futures = [pool.submit(run_one, i, jd_text) for i, jd_text in enumerate(jds)]
+        finished, _ = wait(futures, timeout=budget)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    items = [
+        f.result() if f in finished
+        else {"index": i, "jd_preview": jds[i][:120], "error": "Error: not finished in time; resubmit the batch to retry."}
+        for i, f in enumerate(futures)
+    ]
+
+    # best improvements first; failed items last
+    items.sort(key=lambda r: ("error" in r, -r.get("delta", 0), r["index"]))
+    return {"count": len(items), "results": items}
+
+
+# JD corpus: ingest postings once, rank a resume against all of them
+corpus = JDCorpus(
+    path=os.getenv("CORPUS_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_corpus.sqlite3")),
+    use_idf=os.getenv("CORPUS_IDF", "1") == "1",
+    max_df=float(os.getenv("CORPUS_MAX_DF", "0.5")),
+)
+
+
+@app.route("/corpus/postings", methods=["POST"])
+def corpus_add():
+    """Body: {"title": ..., "text": ...} or a list of those."""
+    data = request.get_json(silent=True)
+    postings = data if isinstance(data, list) else [data]
+    if not postings:
+        return jsonify({"error": "Send at least one posting."}), 400
+    if not all(isinstance(p, dict) and isinstance(p.get("text"), str) and p["text"].strip() for p in postings):
+        return jsonify({"error": "Each posting needs a non-empty `text`."}), 400
+    ids = corpus.add_many(postings)
+    return jsonify({"ids": ids, "count": len(ids)}), 201
+
+
+@app.route("/corpus/postings/<int:posting_id>", methods=["DELETE"])
+def corpus_remove(posting_id):
+    if not corpus.remove(posting_id):
+        return jsonify({"error": "Unknown posting."}), 404
+    return jsonify({"id": posting_id, "removed": True})
+
+
+@app.route("/corpus/rank", methods=["POST"])
+def corpus_rank():
+    """Upload a resume; get the top-k best-fitting postings in the corpus."""
+    resume_file = request.files.get("resume_file")
+    if not resume_file or not resume_file.filename:
+        return jsonify({"error": "Please upload a PDF or DOCX resume."}), 400
+    try:
+        k = max(1, min(int(request.form.get("k", "10")), 100))
+    except ValueError:
+        return jsonify({"error": "`k` must be an integer."}), 400
+
+    try:
+        resume_text = extract_resume_text(resume_file)
+    except Exception as e:
+        return jsonify({"error": f"Error: {str(e)}"}), 400
+
+    started = time.perf_counter()
+    ranked = corpus.rank(resume_text, k=k)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify({"results": ranked, "k": k, "elapsed_ms": elapsed_ms})
+
+
+@app.route("/corpus/stats")
+def corpus_stats():
+    return jsonify(corpus.stats())
+
+
+@app.cli.command("corpus-ingest")
+@click.argument("jsonl_path", type=click.Path(exists=True, dir_okay=False))
+def corpus_ingest(jsonl_path):
+    """Add postings from a JSONL file (one {"title", "text"} object per line)."""
+    postings = []
+    with open(jsonl_path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                posting = json.loads(line)
+            except ValueError as e:
+                raise click.ClickException(f"line {n}: invalid JSON ({e})")
+            if not isinstance(posting, dict):
+                raise click.ClickException(f"line {n}: expected a JSON object, got {type(posting).__name__}")
+            if not isinstance(posting.get("text", ""), str):
+                raise click.ClickException(f"line {n}: `text` must be a string")
+            postings.append(posting)
+    ids = corpus.add_many(p for p in postings if p.get("text", "").strip())
+    click.echo(f"Added {len(ids)} posting(s).")
+
+
+def run_tailor_job(payload: dict, blob: bytes) -> dict:
+    """Same pipeline as index(), run off the request thread."""
+    resume_file = FileStorage(stream=io.BytesIO(blob), filename=payload["filename"])
+    resume_text = extract_resume_text(resume_file)
+    result = tailor(resume_text, payload["jd"])
+    result["result_id"] = store_output(result["output"], payload["name_slug"], payload["template"])
+    result["template"] = payload["template"]
+    return result
+
+
+def run_batch_job(payload: dict, blob: bytes) -> dict:
+    resume_file = FileStorage(stream=io.BytesIO(blob), filename=payload["filename"])
+    resume_text = extract_resume_text(resume_file)
+    # return what is done (the rest as errors) before the queue gives up on the job
+    return tailor_batch(resume_text, payload["jds"], payload["name_slug"], payload["template"], budget=jobs.timeout * 0.9)
+
+
+JOB_HANDLERS = {"tailor": run_tailor_job, "batch": run_batch_job}
+
+
+def run_job(payload: dict, blob: bytes) -> dict:
+    """Job-queue handler; jobs queued before `kind` existed are tailor jobs."""
+    return JOB_HANDLERS[payload.get("kind", "tailor")](payload, blob)
+
+
+jobs = JobQueue(
+    path=os.getenv("JOB_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "magnetic_resume_jobs.sqlite3")),
+    handler=run_job,
+    concurrency=int(os.getenv("JOB_CONCURRENCY", "2")),
+    timeout=float(os.getenv("JOB_TIMEOUT", "120")),
+    retention=float(os.getenv("JOB_RETENTION", "3600")),
+    max_finished=int(os.getenv("JOB_MAX_FINISHED", "1000")),
+    max_abandoned=int(os.getenv("JOB_MAX_ABANDONED", os.getenv("JOB_CONCURRENCY", "2"))),
+)
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    jd_text, resume_file, name_slug, template, error = read_tailor_form()
+    if error:
+        return jsonify({"error": error}), 400
+
+    # reject bad uploads now rather than after they've waited in the queue
+    try:
+        with ingest(resume_file) as upload:
+            blob = upload.read()
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+
+    payload = {"kind": "tailor", "jd": jd_text, "filename": resume_file.filename, "name_slug": name_slug, "template": template}
+    return job_accepted(jobs.submit(payload, blob))
+
+
+def job_accepted(job_id: str):
+    return jsonify({
+        "id": job_id,
+        "status": "queued",
+        "status_url": url_for("job_status", job_id=job_id),
+        "result_url": url_for("job_result", job_id=job_id),
+    }), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    job.pop("result")
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job."}), 404
+    if job["status"] == "failed":
+        # the job's outcome, not a server error: report it like a finished job
+        return jsonify({"id": job_id, "status": job["status"], "error": job["error"]})
+    if job["status"] != "done":
+        return jsonify({"id": job_id, "status": job["status"]}), 202
+
+    result = job["result"]
+    if "results" in result:
+        # a batch: each item downloads by id (?id=...), the session's latest is left alone
+        for item in result["results"]:
+            if "result_id" in item:
+                item["download_pdf"] = url_for("download_pdf", id=item["result_id"])
+                item["download_docx"] = url_for("download_docx", id=item["result_id"])
+        return jsonify({"id": job_id, "status": job["status"], **result})
+
+    # fetching the result makes it the one the download buttons serve
+    remember_output(result["result_id"])
+    if PRERENDER:
+        # results stored before the template was recorded fall back to the default
+        maybe_prerender(result["output"], result.get("template", DEFAULT_TEMPLATE))
+    return jsonify({"id": job_id, "status": job["status"], **result})
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify(tailor_cache.stats())
+
+
+@app.cli.command("cache-invalidate")
+@click.option("--all", "all_versions", is_flag=True, help="Also drop generations for the current prompt version.")
+def cache_invalidate(all_versions):
+    """Drop cached Gemini generations (stale prompt versions by default)."""
+    removed = tailor_cache.invalidate(all_versions=all_versions)
+    click.echo(f"Removed {removed} cached generation(s).")
+
+
+def send_rendered(fmt: str):
+    with metrics.stage("load"):
+        result = load_result()
+    if not result:
         return "Nothing to download. Run tailoring first.", 400
 
-    name_slug = session.get("name_slug", "guest")
-    template = session.get("template", "ATS_CLASSIC")
+    name_slug = result.get("name_slug", "guest")
+    template = result.get("template", "ATS_CLASSIC")
 
-    filename = f"{name_slug}.pdf"
+    # a browser that already holds this exact file gets a 304 without any rendering
+    etag = renderer.render_key(result["output"], template, fmt)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    tmp.close()
+    with metrics.stage("render"):
+        data, etag = renderer.render_resume(result["output"], template, fmt)
 
-    # Pass template into your writer
-    write_resume_pdf(text, tmp.name, title="TAILORED RESUME", template=template)
+    # served from memory; Content-Length comes from the bytes body
+    resp = Response(data, mimetype=renderer.mimetype(fmt))
+    resp.headers["Content-Disposition"] = f'attachment; filename="{name_slug}.{fmt}"'
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
-    return send_file(tmp.name, as_attachment=True, download_name=filename)
+
+@app.route("/download/pdf")
+def download_pdf():
+    return send_rendered("pdf")
 
 
 @app.route("/download/docx")
 def download_docx():
-    text = session.get("last_output")
-    if not text:
+    return send_rendered("docx")
+
+
+def read_bundle_combos():
+    """(template, format) pairs from ?templates=A,B&formats=pdf,docx; every known one by default."""
+    templates = [t for t in request.args.get("templates", "").split(",") if t.strip()] or list(PDF_TEMPLATES)
+    formats = [f for f in request.args.get("formats", "").split(",") if f.strip()] or list(renderer.FORMATS)
+    templates = [t.strip() for t in templates]
+    formats = [f.strip().lower() for f in formats]
+    unknown = [t for t in templates if t not in PDF_TEMPLATES] + [f for f in formats if f not in renderer.FORMATS]
+    if unknown:
+        return None, f"Unknown template or format: {', '.join(unknown)}"
+    return [(t, f) for t in dict.fromkeys(templates) for f in dict.fromkeys(formats)], None
+
+
+@app.route("/download/bundle")
+def download_bundle():
+    with metrics.stage("load"):
+        result = load_result()
+    if not result:
         return "Nothing to download. Run tailoring first.", 400
 
-    name_slug = session.get("name_slug", "guest")
-    template = session.get("template", "ATS_CLASSIC")
-
-    filename = f"{name_slug}.docx"
-
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    tmp.close()
-
-    # Pass template into your writer
-    write_resume_docx(text, tmp.name, title="TAILORED RESUME", template=template)
-
-    return send_file(tmp.name, as_attachment=True, download_name=filename)
+    combos, error = read_bundle_combos()
+    if error:
+        return error, 400
+
+    name_slug = result.get("name_slug", "guest")
+    etag = renderer.bundle_key(result["output"], combos)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    with metrics.stage("render"):
+        rendered = renderer.render_many(result["output"], combos)
+    with metrics.stage("zip"):
+        data = renderer.build_bundle(
+            (f"{name_slug}_{template}.{fmt}", rendered[(template, fmt)]) for template, fmt in combos
+        )
+
+    resp = Response(data, mimetype="application/zip")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{name_slug}_resumes.zip"'
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+# bench/fake_gemini.py
+"""Deterministic local stand-in for genai.GenerativeModel (no network)."""
+import hashlib
+import time
+
+from bench.synthetic import make_resume
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGemini:
+    """
+    generate_content() answers with a synthetic resume seeded by the prompt
+    hash (or, for a section prompt, the section echoed back), wrapped in a
+    little markdown so the cleaner has work to do.
+    latency (seconds) is slept once per call; streamed answers are split
+    into chunk_size-character chunks.
+    """
+
+    def __init__(self, latency: float = 0.0, roles: int = 4, bullets: int = 5, chunk_size: int = 200):
+        self.latency = latency
+        self.roles = roles
+        self.bullets = bullets
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def answer(self, prompt: str) -> str:
+        prompt = str(prompt)
+        if "RESUME SECTION:\n" in prompt:
+            text = prompt.split("RESUME SECTION:\n", 1)[1].split("\n\nRELEVANT JOB DESCRIPTION LINES:", 1)[0]
+        else:
+            seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:4], "big")
+            text = make_resume(self.roles, self.bullets, seed=seed)
+        return "```\n**" + text.replace("\n- ", "\n* ", 3) + "**\n```"
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        text = self.answer(prompt)
+        if not stream:
+            return _Response(text)
+        return iter([_Response(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)])
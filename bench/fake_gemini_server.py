@@ -0,0 +1,169 @@
+# bench/fake_gemini_server.py
+"""
+Local fake of the Gemini REST API (generateContent / streamGenerateContent)
+for exercising the real client stack without network access or quota:
+
+    python -m bench.fake_gemini_server --port 8788 --latency 0.8 --error-rate 0.05
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8788 gunicorn wsgi:app
+
+Answers are FakeGemini's deterministic synthetic resumes. --latency is the
+delay before the first byte; streamed answers then arrive in --chunks pieces
+--chunk-delay apart. A --error-rate fraction of calls fail with a random
+status from --error-codes. GET /stats returns call counts.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.fake_gemini import FakeGemini
+
+ROUTE_RE = re.compile(r"^/v1beta/(?P<model>(?:tuned)?[mM]odels/[^:]+):(?P<method>generateContent|streamGenerateContent)")
+STATUS_NAMES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+def candidate(text: str, finished: bool) -> dict:
+    body = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+    if finished:
+        body["candidates"][0]["finishReason"] = "STOP"
+        body["usageMetadata"] = {"promptTokenCount": 0, "candidatesTokenCount": len(text) // 4}
+    return body
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, chunks=8, chunk_delay=0.0,
+                 error_rate=0.0, error_codes=(429, 503), seed=None):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.chunks = max(1, chunks)
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.model = FakeGemini()
+        self.random = random.Random(seed)
+        self.stats = {"generateContent": 0, "streamGenerateContent": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def roll(self):
+        """(delay before first byte, error status or None) for one call."""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            status = self.random.choice(self.error_codes) if failed else None
+        return delay, status
+
+    def serve_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="fake-gemini", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            with self.server.lock:
+                return self._json(200, dict(self.server.stats))
+        self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        match = ROUTE_RE.match(self.path)
+        if not match:
+            return self._json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+        method = match.group("method")
+        server.count(method)
+
+        try:
+            request = json.loads(body or b"{}")
+            prompt = "".join(p.get("text", "") for c in request.get("contents", []) for p in c.get("parts", []))
+        except (ValueError, AttributeError):
+            return self._json(400, {"error": {"code": 400, "message": "bad request", "status": "INVALID_ARGUMENT"}})
+
+        delay, status = server.roll()
+        time.sleep(delay)
+        if status is not None:
+            server.count("errors")
+            message = {"code": status, "message": "injected failure", "status": STATUS_NAMES.get(status, "UNKNOWN")}
+            return self._json(status, {"error": message})
+
+        text = server.model.answer(prompt)
+        if method == "generateContent":
+            return self._json(200, candidate(text, finished=True))
+
+        # streamGenerateContent (REST): one JSON array, elements flushed as they are "generated"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = -(-len(text) // server.chunks)
+        pieces = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+        for i, piece in enumerate(pieces):
+            prefix = "[" if i == 0 else ",\r\n"
+            suffix = "]" if i == len(pieces) - 1 else ""
+            self._chunk(prefix + json.dumps(candidate(piece, finished=bool(suffix))) + suffix)
+            if suffix == "" and server.chunk_delay:
+                time.sleep(server.chunk_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake Gemini REST server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds added to --latency")
+    parser.add_argument("--chunks", type=int, default=8, help="pieces per streamed answer")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed pieces")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-codes", default="429,503", help="statuses injected failures use")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = FakeGeminiServer(
+        (args.host, args.port), latency=args.latency, jitter=args.jitter, chunks=args.chunks,
+        chunk_delay=args.chunk_delay, error_rate=args.error_rate,
+        error_codes=[int(c) for c in args.error_codes.split(",") if c.strip()], seed=args.seed,
+    )
+    print(f"fake Gemini listening on {server.endpoint}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
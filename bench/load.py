@@ -0,0 +1,462 @@
+# bench/load.py
+"""
+Load test: replay recorded request payloads against the app under gunicorn,
+with bench.fake_gemini_server standing in for Gemini.
+
+    python -m bench.load --generate 200 --requests /tmp/payloads.jsonl
+    python -m bench.load --requests /tmp/payloads.jsonl -c 8 -d 60 --workers 4 --fake-latency 1.5
+    python -m bench.load --requests /tmp/payloads.jsonl --rate 5 -d 60 --fake-error-rate 0.05 -- --threads 4
+
+Payloads are JSON lines, replayed in order (cycling) by every client:
+
+    {"route": "/", "jd": "...", "resume": "cv.pdf", "template": "ATS_BLUE", "downloads": ["/download/pdf"]}
+
+- route: "/" (default), "/stream", "/batch" (takes "jds": [...]) or "/jobs"
+- resume: PDF/DOCX path (relative to the payload file), or "resume_text"
+  (sent as a plain DOCX); neither means a synthetic resume
+- template, display_name: form fields as the page sends them
+- downloads: GET routes fetched afterwards in the same session
+Lines without "jd"/"jds" (e.g. a backlog file) are skipped.
+
+-c runs a closed loop (N clients, each waits for its answer); --rate runs an
+open loop (arrivals on a fixed schedule; latency counts from the scheduled
+time, so a stalled server can't hide its queueing). Arguments after -- go to
+gunicorn. Rate limiting is off unless --env RATE_LIMIT_PER_MINUTE=... is given,
+since every client shares one address. Prints per-route p50/p95/p99 and error
+rates, throughput, and worker RSS sampled over the run; --output keeps the
+full report as JSON.
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+ROUTES = ("/", "/stream", "/batch", "/jobs")
+
+
+# -- payloads ----------------------------------------------------------------
+
+
+def generate_payloads(path: str, count: int, seed: int = 0):
+    """Synthetic payload file: mostly page submits, some streams, batches and jobs."""
+    from bench.synthetic import SIZES, make_jd, make_resume
+
+    r = random.Random(seed)
+    sizes = list(SIZES.items())
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            _, (roles, bullets) = r.choice(sizes)
+            route = r.choices(ROUTES, weights=(70, 20, 5, 5))[0]
+            payload = {"route": route, "resume_text": make_resume(roles, bullets, seed=seed + i),
+                       "template": r.choice(("ATS_CLASSIC", "ATS_BLUE"))}
+            if route == "/batch":
+                payload["jds"] = [make_jd(r.randint(4, 12), seed=seed + i * 10 + k) for k in range(3)]
+            else:
+                payload["jd"] = make_jd(r.randint(4, 12), seed=seed + i)
+            if route == "/" and r.random() < 0.5:
+                payload["downloads"] = [r.choice(("/download/pdf", "/download/docx"))]
+            f.write(json.dumps(payload) + "\n")
+
+
+def load_payloads(path: str):
+    """Parsed payloads with the resume bytes resolved once; (payloads, skipped lines)."""
+    from bench.synthetic import make_resume, resume_docx
+
+    base = os.path.dirname(os.path.abspath(path))
+    payloads, skipped = [], 0
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            p = json.loads(line)
+            if not isinstance(p, dict) or not ("jd" in p or "jds" in p):
+                skipped += 1
+                continue
+            route = p.get("route", "/")
+            if route not in ROUTES:
+                raise ValueError(f"{path}:{n + 1}: unknown route {route!r}")
+            if p.get("resume"):
+                with open(os.path.join(base, p["resume"]), "rb") as rf:
+                    blob, filename = rf.read(), os.path.basename(p["resume"])
+            else:
+                blob, filename = resume_docx(p.get("resume_text") or make_resume(3, 4, seed=n)), "resume.docx"
+            payloads.append({
+                "route": route,
+                "data": _form(p),
+                "file": (filename, blob),
+                "downloads": list(p.get("downloads", ())),
+            })
+    return payloads, skipped
+
+
+def _form(p: dict):
+    data = [("template", p.get("template", "ATS_CLASSIC")), ("display_name", p.get("display_name", ""))]
+    if "jds" in p:
+        data.append(("jds", json.dumps(p["jds"])))
+    if "jd" in p:
+        data.append(("jd", p["jd"]))
+    return data
+
+
+# -- the app under test ------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, endpoint: str, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "load-test")
+    env.update({
+        "GEMINI_API_ENDPOINT": endpoint,
+        "RESULT_STORE_PATH": os.path.join(workdir, "results.sqlite3"),
+        "TAILOR_CACHE_PATH": os.path.join(workdir, "tailor_cache.sqlite3"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "CORPUS_PATH": os.path.join(workdir, "corpus.sqlite3"),
+        "METRICS_PATH": os.path.join(workdir, "metrics.sqlite3"),
+        "RATE_LIMIT_PATH": os.path.join(workdir, "ratelimit.sqlite3"),
+        "ADMISSION_DIR": os.path.join(workdir, "admission"),
+        "RATE_LIMIT_PER_MINUTE": "0",
+    })
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-b", args.bind, *args.gunicorn_args, "wsgi:app"]
+    log = open(os.path.join(workdir, "gunicorn.log"), "wb")
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(session, base: str, proc: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {proc.returncode}")
+        try:
+            if session.get(base + "/", timeout=2).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"app not ready after {timeout:g}s")
+
+
+# -- worker memory -----------------------------------------------------------
+
+
+def child_pids(pid: int):
+    pids = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        with open(path) as f:
+            pids += [int(p) for p in f.read().split()]
+    return pids
+
+
+def memory_kib(pid: int):
+    """(rss, pss) in KiB; pss is None without smaps_rollup."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split(":")[0] in ("Rss", "Pss")}
+        return fields.get("Rss", 0), fields.get("Pss")
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]), None
+        except OSError:
+            pass
+    return 0, None
+
+
+class RssSampler:
+    """Samples every gunicorn worker's RSS/PSS each `interval` seconds in a background thread."""
+
+    def __init__(self, master_pid: int, interval: float = 1.0):
+        self.master_pid = master_pid
+        self.interval = interval
+        self.samples = []  # (t, {pid: (rss_kib, pss_kib)})
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._start = time.monotonic()
+
+    def _run(self):
+        while not self._stop.is_set():
+            workers = {pid: memory_kib(pid) for pid in child_pids(self.master_pid)}
+            self.samples.append((round(time.monotonic() - self._start, 2), workers))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> dict:
+        per_worker = defaultdict(list)
+        for _, workers in self.samples:
+            for pid, (rss, _) in workers.items():
+                per_worker[pid].append(rss)
+        return {
+            "workers": {str(pid): {"first_mib": round(v[0] / 1024, 1), "max_mib": round(max(v) / 1024, 1),
+                                   "last_mib": round(v[-1] / 1024, 1)} for pid, v in per_worker.items()},
+            "timeline": [
+                {"t": t, "workers": len(w), "rss_mib": round(sum(r for r, _ in w.values()) / 1024, 1),
+                 "pss_mib": round(sum(p or 0 for _, p in w.values()) / 1024, 1)}
+                for t, w in self.samples
+            ],
+        }
+
+
+# -- load --------------------------------------------------------------------
+
+
+class Recorder:
+    def __init__(self):
+        self.rows = []  # (route, status, seconds); status 0 = connection error / timeout
+        self._lock = threading.Lock()
+
+    def add(self, route: str, status: int, seconds: float):
+        with self._lock:
+            self.rows.append((route, status, seconds))
+
+
+def fire(session, base: str, payload: dict, recorder: Recorder, timeout: float, started: float = None):
+    """One payload (plus its downloads); `started` backdates the first request to its scheduled time."""
+    start = started if started is not None else time.perf_counter()
+    route = payload["route"]
+    status = 0
+    try:
+        r = session.post(base + route, data=payload["data"], files={"resume_file": payload["file"]},
+                         timeout=timeout, stream=route == "/stream")
+        if route == "/stream":
+            for _ in r.iter_content(chunk_size=None):
+                pass
+        status = r.status_code
+    except Exception:
+        pass
+    recorder.add(route, status, time.perf_counter() - start)
+    if not 200 <= status < 300:
+        return
+    for path in payload["downloads"]:
+        start = time.perf_counter()
+        try:
+            status = session.get(base + path, timeout=timeout).status_code
+        except Exception:
+            status = 0
+        recorder.add("GET " + path, status, time.perf_counter() - start)
+
+
+def closed_loop(base, payloads, recorder, concurrency, deadline, count, timeout):
+    import requests
+
+    order = itertools.cycle(payloads)
+    budget = itertools.count()
+    lock = threading.Lock()
+
+    def client():
+        session = requests.Session()
+        session.get(base + "/", timeout=timeout)  # page load: session cookie, as in the browser
+        while time.monotonic() < deadline:
+            with lock:
+                if count and next(budget) >= count:
+                    return
+                payload = next(order)
+            fire(session, base, payload, recorder, timeout)
+
+    threads = [threading.Thread(target=client, name=f"client-{i}") for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def open_loop(base, payloads, recorder, rate, deadline, count, timeout, max_clients):
+    import requests
+
+    local = threading.local()
+
+    def run(payload, scheduled):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        fire(session, base, payload, recorder, timeout, started=scheduled)
+
+    with ThreadPoolExecutor(max_workers=max_clients, thread_name_prefix="client") as pool:
+        start = time.perf_counter()
+        for i, payload in enumerate(itertools.cycle(payloads)):
+            if (count and i >= count) or time.monotonic() >= deadline:
+                break
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, payload, scheduled)
+
+
+# -- report ------------------------------------------------------------------
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    from bench.run import percentile
+
+    by_route = defaultdict(list)
+    for route, status, seconds in recorder.rows:
+        by_route[route].append((status, seconds))
+    routes = {}
+    for route, rows in sorted(by_route.items()):
+        times = [s * 1000 for _, s in rows]
+        statuses = defaultdict(int)
+        for status, _ in rows:
+            statuses[str(status)] += 1
+        errors = sum(1 for status, _ in rows if not 200 <= status < 400)
+        routes[route] = {
+            "n": len(rows),
+            "rps": round(len(rows) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4),
+            "statuses": dict(statuses),
+            "p50_ms": round(percentile(times, 0.50), 1),
+            "p95_ms": round(percentile(times, 0.95), 1),
+            "p99_ms": round(percentile(times, 0.99), 1),
+            "max_ms": round(max(times), 1),
+        }
+    total = len(recorder.rows)
+    errors = sum(1 for _, status, _ in recorder.rows if not 200 <= status < 400)
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 2),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "routes": routes,
+    }
+
+
+def print_report(report: dict):
+    s = report["summary"]
+    print(f"\n{s['requests']} requests in {s['elapsed_s']}s: {s['rps']} req/s, error rate {s['error_rate'] * 100:.1f}%")
+    print(f"{'route':22s} {'n':>6s} {'req/s':>7s} {'err%':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}  statuses")
+    for route, r in s["routes"].items():
+        print(f"{route:22s} {r['n']:6d} {r['rps']:7.2f} {r['error_rate'] * 100:6.1f} "
+              f"{r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f}  {r['statuses']}")
+    print(f"fake Gemini: {report['gemini']}")
+    for pid, w in report["rss"]["workers"].items():
+        print(f"worker {pid}: RSS {w['first_mib']} -> {w['last_mib']} MiB (max {w['max_mib']})")
+    timeline = report["rss"]["timeline"]
+    step = max(1, len(timeline) // 10)
+    print("total RSS/PSS over time: " + ", ".join(f"{p['t']:g}s {p['rss_mib']}/{p['pss_mib']} MiB" for p in timeline[::step]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", default=os.path.join(BENCH_DIR, "load_requests.jsonl"), help="payload JSON lines")
+    parser.add_argument("--generate", type=int, default=0, metavar="N", help="write N synthetic payloads to --requests and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="closed loop: clients in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="open loop: payloads per second (overrides -c)")
+    parser.add_argument("--max-clients", type=int, default=256, help="open loop: cap on outstanding requests")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("-n", "--count", type=int, default=0, help="stop after N payloads (0 = duration only)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--bind", default=None, help="gunicorn address (default: a free local port)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app env (repeatable)")
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--fake-latency", type=float, default=1.0, help="fake Gemini seconds before first byte")
+    parser.add_argument("--fake-jitter", type=float, default=0.2)
+    parser.add_argument("--fake-chunks", type=int, default=8)
+    parser.add_argument("--fake-chunk-delay", type=float, default=0.05)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--fake-error-codes", default="429,503")
+    parser.add_argument("--output", default=None, help="write the full report (with RSS timeline) as JSON")
+    parser.add_argument("gunicorn_args", nargs="*", help="extra gunicorn arguments (after --)")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_payloads(args.requests, args.generate, seed=args.seed)
+        print(f"wrote {args.generate} payloads to {args.requests}")
+        return 0
+    if not os.path.exists(args.requests):
+        print(f"no payloads at {args.requests}; create some with --generate N", file=sys.stderr)
+        return 2
+
+    import requests
+
+    from bench.fake_gemini_server import FakeGeminiServer
+
+    payloads, skipped = load_payloads(args.requests)
+    if skipped:
+        print(f"skipped {skipped} lines without jd/jds", file=sys.stderr)
+    if not payloads:
+        print(f"no payloads in {args.requests}", file=sys.stderr)
+        return 2
+    args.bind = args.bind or f"127.0.0.1:{free_port()}"
+    base = "http://" + args.bind
+
+    fake = FakeGeminiServer(
+        ("127.0.0.1", 0), latency=args.fake_latency, jitter=args.fake_jitter, chunks=args.fake_chunks,
+        chunk_delay=args.fake_chunk_delay, error_rate=args.fake_error_rate,
+        error_codes=[int(c) for c in args.fake_error_codes.split(",") if c.strip()], seed=args.seed,
+    )
+    fake.serve_in_thread()
+
+    with tempfile.TemporaryDirectory(prefix="load-") as workdir:
+        proc = start_app(args, fake.endpoint, workdir)
+        try:
+            wait_ready(requests.Session(), base, proc)
+            sampler = RssSampler(proc.pid, args.rss_interval).start()
+            recorder = Recorder()
+            start = time.perf_counter()
+            deadline = time.monotonic() + args.duration
+            if args.rate > 0:
+                open_loop(base, payloads, recorder, args.rate, deadline, args.count, args.timeout, args.max_clients)
+            else:
+                closed_loop(base, payloads, recorder, args.concurrency, deadline, args.count, args.timeout)
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        fake.shutdown()
+
+    report = {
+        "meta": {
+            "payloads": args.requests,
+            "mode": f"rate {args.rate:g}/s" if args.rate > 0 else f"concurrency {args.concurrency}",
+            "workers": args.workers,
+            "gunicorn_args": args.gunicorn_args,
+            "env": args.env,
+            "fake_gemini": {"latency": args.fake_latency, "jitter": args.fake_jitter, "error_rate": args.fake_error_rate},
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "summary": summarize(recorder, elapsed),
+        "gemini": dict(fake.stats),
+        "rss": sampler.summary(),
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
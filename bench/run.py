@@ -0,0 +1,207 @@
+# bench/run.py
+"""
+Benchmarks for the hot paths: upload extraction, scoring, output cleanup,
+PDF/DOCX rendering and the full index() flow with a local Gemini stand-in.
+
+    python -m bench.run                     # run, compare with bench/baseline.json if present
+    python -m bench.run --save-baseline     # run and store the results as the new baseline
+    python -m bench.run --only render -n 50 # subset, more iterations
+
+Results (p50/p95/mean in ms, peak traced memory in KiB) are written as JSON.
+A benchmark regresses when its p50 or peak memory exceeds the baseline by more
+than --tolerance (and by more than --min-delta-ms for times); any regression
+exits with status 1. Baselines are machine-specific and are not committed.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+
+
+def clear_caches():
+    """Drop per-content caches so every iteration does the real work (process-wide warm state stays)."""
+    from utils import docx_reader, pdf_reader, renderer, resume_model, text_analysis
+
+    for module in (docx_reader, pdf_reader, renderer, resume_model, text_analysis):
+        with module._lock:
+            module._cache.clear()
+
+
+def percentile(samples, q):
+    s = sorted(samples)
+    k = (len(s) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def measure(fn, iterations: int, warmup: int = 2):
+    for _ in range(warmup):
+        clear_caches()
+        fn()
+    times = []
+    for _ in range(iterations):
+        clear_caches()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # one extra traced run for memory; tracemalloc slows everything, so it is kept out of the timings
+    clear_caches()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "n": iterations,
+        "p50_ms": round(percentile(times, 0.50), 3),
+        "p95_ms": round(percentile(times, 0.95), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def pipeline_cases(data):
+    from utils.alignment import alignment_facts
+    from utils.docx_reader import extract_text_from_docx
+    from utils.docx_writer import write_resume_docx
+    from utils.keyword_matcher import ats_intelligence
+    from utils.output_cleaner import clean_output
+    from utils.pdf_reader import extract_text_from_pdf
+    from utils.pdf_writer import write_resume_pdf
+
+    from bench.fake_gemini import FakeGemini
+    from bench.synthetic import SIZES
+
+    for size, (text, jd, pdf, docx) in data.items():
+        roles, bullets = SIZES[size]
+        raw = FakeGemini(roles=roles, bullets=bullets).answer(text + jd)
+        yield f"extract_pdf[{size}]", lambda pdf=pdf: extract_text_from_pdf(io.BytesIO(pdf))
+        yield f"extract_docx[{size}]", lambda docx=docx: extract_text_from_docx(io.BytesIO(docx))
+        yield f"alignment_facts[{size}]", lambda text=text, jd=jd: alignment_facts(text, jd)
+        yield f"ats_intelligence[{size}]", lambda text=text, jd=jd: ats_intelligence(text, jd)
+        yield f"clean_output[{size}]", lambda raw=raw: clean_output(raw)
+        yield f"render_pdf[{size}]", lambda text=text: write_resume_pdf(text, io.BytesIO())
+        yield f"render_docx[{size}]", lambda text=text: write_resume_docx(text, io.BytesIO())
+
+
+def index_cases(data, workdir: str):
+    # the app reads its storage paths at import time
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    for var, name in (("RESULT_STORE_PATH", "results.sqlite3"), ("TAILOR_CACHE_PATH", "tailor_cache.sqlite3"),
+                      ("JOB_QUEUE_PATH", "jobs.sqlite3"), ("CORPUS_PATH", "corpus.sqlite3"),
+                      ("METRICS_PATH", "metrics.sqlite3"), ("RATE_LIMIT_PATH", "ratelimit.sqlite3"),
+                      ("ADMISSION_DIR", "admission")):
+        os.environ[var] = os.path.join(workdir, name)
+    # every iteration comes from one client; the limiter would stop the run
+    os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+    import app as app_module
+    from bench.fake_gemini import FakeGemini
+
+    app_module.model = FakeGemini()
+    client = app_module.app.test_client()
+    counter = iter(range(10 ** 9))
+
+    def post(docx, jd):
+        # a fresh JD line per call keeps the tailoring cache cold, like a new request
+        form = {"jd": f"{jd}\nRef: bench-{next(counter)}", "resume_file": (io.BytesIO(docx), "resume.docx")}
+        resp = client.post("/", data=form, content_type="multipart/form-data")
+        if resp.status_code != 200 or b"Before" not in resp.data:
+            raise RuntimeError(f"index() failed with {resp.status_code}")
+
+    for size, (_, jd, _, docx) in data.items():
+        yield f"index_flow[{size}]", lambda docx=docx, jd=jd: post(docx, jd)
+
+
+def compare(results, baseline, tolerance: float, min_delta_ms: float):
+    """Return [(name, metric, old, new)] for every regression against the baseline."""
+    regressions = []
+    for name, cur in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if cur["p50_ms"] > old["p50_ms"] * (1 + tolerance) and cur["p50_ms"] - old["p50_ms"] > min_delta_ms:
+            regressions.append((name, "p50_ms", old["p50_ms"], cur["p50_ms"]))
+        if cur["peak_kib"] > old["peak_kib"] * (1 + tolerance) and cur["peak_kib"] - old["peak_kib"] > 64:
+            regressions.append((name, "peak_kib", old["peak_kib"], cur["peak_kib"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--only", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    from bench.synthetic import corpus
+
+    data = corpus()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        cases = list(pipeline_cases(data)) + list(index_cases(data, workdir))
+        for name, fn in cases:
+            if args.only and args.only not in name:
+                continue
+            results[name] = measure(fn, args.iterations)
+            r = results[name]
+            print(f"{name:28s} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms  peak {r['peak_kib']:9.1f} KiB", flush=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "iterations": args.iterations,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)  # a partial run (--only) refreshes just its entries
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": baseline}, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    for name, metric, old, new in regressions:
+        print(f"REGRESSION {name} {metric}: {old} -> {new} ({(new / old - 1) * 100:+.0f}%)", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"no regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# bench/synthetic.py
+"""Deterministic synthetic resumes and job descriptions for the benchmarks."""
+import io
+import random
+
+from docx import Document
+
+from utils.renderer import render_bytes
+
+SKILLS = [
+    "Python", "SQL", "Go", "Java", "TypeScript", "React", "Flask", "Django", "FastAPI", "Spark",
+    "Kafka", "Airflow", "dbt", "Snowflake", "BigQuery", "PostgreSQL", "Redis", "Docker",
+    "Kubernetes", "Terraform", "AWS", "GCP", "Azure", "CI/CD", "GitHub Actions", "Pandas",
+    "NumPy", "PyTorch", "TensorFlow", "scikit-learn", "Tableau", "Looker", "GraphQL", "gRPC",
+]
+VERBS = [
+    "Built", "Designed", "Led", "Migrated", "Automated", "Optimized", "Scaled", "Owned",
+    "Shipped", "Reduced", "Improved", "Implemented", "Mentored", "Launched",
+]
+OBJECTS = [
+    "data pipelines", "REST APIs", "batch ETL jobs", "streaming ingestion", "ML feature store",
+    "reporting dashboards", "internal tooling", "billing service", "search ranking",
+    "deployment workflows", "observability stack", "customer onboarding flow",
+]
+OUTCOMES = [
+    "cutting latency by {n}%", "saving ${n}K per year", "serving {n}M requests a day",
+    "reducing incidents by {n}%", "for {n} internal teams", "improving conversion by {n}%",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Data"]
+TITLES = ["Software Engineer", "Senior Data Engineer", "Backend Engineer", "Platform Engineer", "ML Engineer"]
+MONTHS = ["Jan", "Mar", "May", "Jul", "Sep", "Nov"]
+
+BOILERPLATE = [
+    "We are an equal opportunity employer and value diversity at our company.",
+    "Benefits include health insurance, 401(k) matching and flexible time off.",
+    "About us: we are a fast-growing team on a mission to modernize hiring.",
+]
+
+# (roles, bullets per role) -> roughly 1, 2 and 5 rendered pages
+SIZES = {
+    "small": (2, 4),
+    "medium": (5, 6),
+    "large": (14, 8),
+}
+
+
+def _bullet(r: random.Random) -> str:
+    skills = ", ".join(r.sample(SKILLS, 2))
+    outcome = r.choice(OUTCOMES).format(n=r.randint(5, 90))
+    return f"- {r.choice(VERBS)} {r.choice(OBJECTS)} with {skills}, {outcome}"
+
+
+def make_resume(roles: int, bullets: int, seed: int = 0) -> str:
+    """A resume in the layout the model is asked to produce (name, contact, ALL CAPS sections)."""
+    r = random.Random(seed)
+    lines = [
+        "JANE DOE",
+        "jane.doe@example.com | (555) 010-2030 | Austin, TX | linkedin.com/in/janedoe",
+        "",
+        "SUMMARY",
+        f"Engineer with {roles + 2} years building {r.choice(OBJECTS)} and {r.choice(OBJECTS)} "
+        f"using {', '.join(r.sample(SKILLS, 4))}.",
+        "",
+        "PROFESSIONAL EXPERIENCE",
+    ]
+    year = 2024
+    for _ in range(roles):
+        start = year - r.randint(1, 3)
+        lines.append(f"{r.choice(COMPANIES)} - {r.choice(TITLES)}")
+        lines.append(f"{r.choice(MONTHS)} {start} - {r.choice(MONTHS)} {year}")
+        lines.extend(_bullet(r) for _ in range(bullets))
+        lines.append("")
+        year = start
+    lines.append("TECHNICAL SKILLS")
+    for category in ("Languages", "Data", "Cloud", "Tools"):
+        lines.append(f"- {category}: {', '.join(r.sample(SKILLS, 6))}")
+    lines += ["", "EDUCATION", "University of Texas - BS Computer Science", "2014"]
+    return "\n".join(lines)
+
+
+def make_jd(requirements: int, seed: int = 0, boilerplate: bool = True) -> str:
+    r = random.Random(seed + 10_000)
+    lines = [f"{r.choice(TITLES)} at {r.choice(COMPANIES)}", "", "Responsibilities"]
+    lines += [f"- {r.choice(VERBS)} {r.choice(OBJECTS)} using {r.choice(SKILLS)}" for _ in range(requirements)]
+    lines += ["", "Requirements"]
+    lines += [
+        f"- {r.randint(2, 8)}+ years of experience with {', '.join(r.sample(SKILLS, 3))}"
+        for _ in range(requirements)
+    ]
+    if boilerplate:
+        lines += [""] + BOILERPLATE
+    return "\n".join(lines)
+
+
+def resume_pdf(text: str) -> bytes:
+    return render_bytes(text, "ATS_CLASSIC", "pdf")
+
+
+def resume_docx(text: str) -> bytes:
+    """A plain upload-style DOCX (one paragraph per line), not our styled export."""
+    doc = Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def corpus(seed: int = 0):
+    """{size: (resume_text, jd_text, pdf_bytes, docx_bytes)} for every entry in SIZES."""
+    out = {}
+    for i, (size, (roles, bullets)) in enumerate(SIZES.items()):
+        text = make_resume(roles, bullets, seed=seed + i)
+        jd = make_jd(requirements=roles * 2 + 4, seed=seed + i)
+        out[size] = (text, jd, resume_pdf(text), resume_docx(text))
+    return out
@@ -0,0 +1,6 @@
+# gunicorn.conf.py -- picked up automatically when gunicorn starts in this directory
+from utils import boot
+
+
+def post_fork(server, worker):
+    boot.report("worker")
@@ -0,0 +1,41 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py reads its settings at import time: keep all state in a scratch dir
+_STATE = tempfile.mkdtemp(prefix="magnetic-resume-tests-")
+os.environ.update({
+    "GOOGLE_API_KEY": "test",
+    "RESULT_STORE_PATH": os.path.join(_STATE, "results.sqlite3"),
+    "TAILOR_CACHE_PATH": os.path.join(_STATE, "tailor_cache.sqlite3"),
+    "JOB_QUEUE_PATH": os.path.join(_STATE, "jobs.sqlite3"),
+    "CORPUS_PATH": os.path.join(_STATE, "corpus.sqlite3"),
+    "METRICS_PATH": os.path.join(_STATE, "metrics.sqlite3"),
+    "RATE_LIMIT_PATH": os.path.join(_STATE, "ratelimit.sqlite3"),
+    "ADMISSION_DIR": os.path.join(_STATE, "admission"),
+    "RATE_LIMIT_PER_MINUTE": "0",
+    "TRUSTED_PROXY_HOPS": "1",
+})
+
+
+@pytest.fixture
+def app_module():
+    """The app module with Gemini replaced by the deterministic local fake."""
+    import app as app_module
+    from bench.fake_gemini import FakeGemini
+
+    previous = app_module.model
+    app_module.model = FakeGemini()
+    yield app_module
+    app_module.model = previous
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
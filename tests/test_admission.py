@@ -0,0 +1,70 @@
+# tests/test_admission.py
+import fcntl
+import subprocess
+import sys
+
+import pytest
+
+from utils.admission import ConcurrencyLimiter, RateLimiter, Rejected, SlotPool
+
+
+def test_new_session_does_not_reset_rate_limit(app_module, monkeypatch, tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate.sqlite3"), per_minute=1, burst=2, clock=lambda: 1000.0)
+    monkeypatch.setattr(app_module, "rate_limiter", limiter)
+    statuses = []
+    for _ in range(3):
+        # a fresh cookie jar per request, like a cookieless script
+        client = app_module.app.test_client()
+        client.get("/")
+        statuses.append(client.post("/jobs", data={}).status_code)
+    assert statuses[:2] == [400, 400]
+    assert statuses[2] == 429
+
+
+def test_clients_behind_the_proxy_get_their_own_buckets(app_module, monkeypatch, tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate.sqlite3"), per_minute=1, burst=1, clock=lambda: 1000.0)
+    monkeypatch.setattr(app_module, "rate_limiter", limiter)
+    client = app_module.app.test_client()
+
+    def post(forwarded_for):
+        return client.post("/jobs", data={}, headers={"X-Forwarded-For": forwarded_for}).status_code
+
+    # every request arrives from the proxy's address; the last hop names the client
+    assert post("198.51.100.7") == 400
+    assert post("203.0.113.9") == 400
+    assert post("10.0.0.1, 198.51.100.7") == 429
+
+
+def test_rate_limiter_refills(tmp_path):
+    now = [0.0]
+    limiter = RateLimiter(str(tmp_path / "rate.sqlite3"), per_minute=60, burst=1, clock=lambda: now[0])
+    limiter.take("a")
+    with pytest.raises(Rejected) as e:
+        limiter.take("a")
+    assert e.value.status == 429
+    limiter.take("b")
+    now[0] += 1.0
+    limiter.take("a")
+
+
+def test_slot_stats_never_take_a_lock(tmp_path, monkeypatch):
+    limiter = ConcurrencyLimiter(str(tmp_path), max_inflight=2, max_waiting=1, max_wait=0)
+    slot, _ = limiter.acquire()
+    flocks = []
+    monkeypatch.setattr(fcntl, "flock", lambda *args: flocks.append(args))
+    assert limiter.stats()["inflight"] == 1
+    assert flocks == []
+    monkeypatch.undo()
+    slot.release()
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_slot_of_dead_holder_counts_as_free(tmp_path):
+    pool = SlotPool(str(tmp_path), "inflight", 1)
+    proc = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    with open(pool.paths[0], "w") as f:
+        f.write("%10d" % int(proc.stdout))
+    assert pool.in_use() == 0
+    slot = pool.try_acquire()
+    assert slot is not None and pool.in_use() == 1
+    slot.release()
@@ -0,0 +1,68 @@
+# tests/test_jd_corpus.py
+import math
+
+import pytest
+
+from bench.synthetic import make_jd, make_resume
+from utils.jd_corpus import JDCorpus
+
+
+def full_weight(snap, pid):
+    # the definition the incremental bookkeeping must agree with
+    n = len(snap.doc_terms)
+    return sum(math.log((n + 1) / (len(snap.index[t]) + 1)) + 1.0 for t in snap.doc_terms[pid])
+
+
+def test_incremental_weights_match_full_recompute(tmp_path):
+    corpus = JDCorpus(str(tmp_path / "corpus.sqlite3"))
+    ids = corpus.add_many([{"title": f"jd {i}", "text": make_jd(2 + i % 5, seed=i)} for i in range(12)])
+    corpus.remove(ids[3])
+    corpus.remove(ids[7])
+    corpus.add("late", make_jd(4, seed=99))
+
+    snap = corpus._current()
+    for pid in snap.doc_terms:
+        assert corpus._doc_weight(snap, pid) == pytest.approx(full_weight(snap, pid))
+
+    # a second process reloading from disk ranks the same way
+    reloaded = JDCorpus(corpus.path)
+    resume = make_resume(2, 4, seed=0)
+    assert reloaded.rank(resume, k=5) == corpus.rank(resume, k=5)
+
+
+def test_snapshots_are_not_mutated_by_writes(tmp_path):
+    corpus = JDCorpus(str(tmp_path / "corpus.sqlite3"))
+    corpus.add_many([{"title": f"jd {i}", "text": make_jd(3, seed=i)} for i in range(5)])
+    old = corpus._current()
+    index = {t: set(ids) for t, ids in old.index.items()}
+    log_df = dict(old.log_df)
+
+    removed = next(iter(old.doc_terms))
+    corpus.add("new", make_jd(3, seed=50))
+    corpus.remove(removed)
+
+    assert {t: set(ids) for t, ids in old.index.items()} == index
+    assert old.log_df == log_df
+    assert removed not in corpus._current().doc_terms
+
+
+def test_generic_terms_do_not_count_as_matches(tmp_path):
+    corpus = JDCorpus(str(tmp_path / "corpus.sqlite3"), max_df=0.5)
+    corpus.add_many([
+        {"title": "rust", "text": "Rust engineer, experience required"},
+        {"title": "go", "text": "Go engineer, experience required"},
+        {"title": "java", "text": "Java engineer, experience required"},
+    ])
+    ranked = corpus.rank("Rust engineer with experience")
+    assert [r["title"] for r in ranked] == ["rust"]
+    assert ranked[0]["matched_count"] == 1
+
+
+def test_corpus_api_rejects_empty_and_malformed_input(client, tmp_path):
+    assert client.post("/corpus/postings", json=[]).status_code == 400
+
+    path = tmp_path / "postings.jsonl"
+    path.write_text('{"title": "ok", "text": "Python engineer"}\n["not", "an", "object"]\n', encoding="utf-8")
+    result = client.application.test_cli_runner().invoke(args=["corpus-ingest", str(path)])
+    assert result.exit_code != 0
+    assert "line 2: expected a JSON object" in result.output
@@ -0,0 +1,191 @@
+# tests/test_jobs.py
+import io
+import json
+import threading
+import time
+from contextlib import closing
+
+from bench.synthetic import make_jd, make_resume, resume_docx
+from utils.jobs import JobQueue
+
+
+def wait_for_job(client, job_id, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/jobs/{job_id}").get_json()["status"]
+        if status in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {status} after {timeout:g}s")
+
+
+def submit(client, template="ATS_BLUE"):
+    data = {
+        "jd": make_jd(6, seed=1),
+        "template": template,
+        "resume_file": (io.BytesIO(resume_docx(make_resume(2, 3, seed=1))), "resume.docx"),
+    }
+    response = client.post("/jobs", data=data)
+    assert response.status_code == 202
+    return response.get_json()["id"]
+
+
+def test_job_result_after_completion(client):
+    job_id = submit(client)
+    assert wait_for_job(client, job_id) == "done"
+
+    response = client.get(f"/jobs/{job_id}/result")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "done"
+    assert body["template"] == "ATS_BLUE"
+    assert body["output"]
+    assert body["result_id"]
+
+    # the fetched result is what the download buttons serve
+    download = client.get("/download/pdf")
+    assert download.status_code == 200
+    assert download.data.startswith(b"%PDF")
+
+
+def test_job_result_with_prerender(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "PRERENDER", True)
+    job_id = submit(client, template="ATS_CLASSIC")
+    assert wait_for_job(client, job_id) == "done"
+    assert client.get(f"/jobs/{job_id}/result").status_code == 200
+
+
+def test_batch_runs_as_a_job(client):
+    data = {
+        "jds": json.dumps([make_jd(4, seed=2), make_jd(5, seed=3)]),
+        "resume_file": (io.BytesIO(resume_docx(make_resume(2, 3, seed=1))), "resume.docx"),
+    }
+    response = client.post("/batch", data=data)
+    assert response.status_code == 202
+    job_id = response.get_json()["id"]
+    assert wait_for_job(client, job_id) == "done"
+
+    body = client.get(f"/jobs/{job_id}/result").get_json()
+    assert body["count"] == 2
+    assert sorted(item["index"] for item in body["results"]) == [0, 1]
+    download = client.get(body["results"][0]["download_pdf"])
+    assert download.status_code == 200
+    assert download.data.startswith(b"%PDF")
+
+
+def test_batch_reports_unfinished_jds(app_module, monkeypatch):
+    release = threading.Event()
+
+    def generate(resume_text, jd_text):
+        if "slow" in jd_text:
+            release.wait(5)
+        return resume_text
+
+    monkeypatch.setattr(app_module, "generate_tailored_resume", generate)
+    try:
+        result = app_module.tailor_batch("Python engineer", ["Python role", "slow Python role"], "guest", "ATS_CLASSIC", budget=0.5)
+    finally:
+        release.set()
+    assert result["count"] == 2
+    done, late = result["results"]
+    assert done["index"] == 0 and "error" not in done
+    assert late["index"] == 1 and "not finished in time" in late["error"]
+
+
+def test_failed_job_result_is_not_a_server_error(client, app_module, monkeypatch):
+    def tailor(resume_text, jd_text):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(app_module, "tailor", tailor)
+    job_id = submit(client)
+    assert wait_for_job(client, job_id) == "failed"
+
+    response = client.get(f"/jobs/{job_id}/result")
+    assert response.status_code == 200
+    assert response.get_json() == {"id": job_id, "status": "failed", "error": "Error: model unavailable"}
+
+
+def test_unknown_job(client):
+    assert client.get("/jobs/nope/result").status_code == 404
+    assert client.get("/jobs/nope").status_code == 404
+
+
+def test_get_starts_workers(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler=lambda payload, blob: {"ok": True}, poll_interval=0.05)
+    # a job queued by another process (or before a restart): nothing has been submitted here
+    other = JobQueue(queue.path, handler=queue.handler)
+    with closing(other._connect()) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, payload, created_at) VALUES ('old', 'queued', '{}', 0)"
+        )
+    assert queue._started_pid is None
+    queue.counts()
+    assert queue._started_pid is None
+    assert queue.get("old") is not None  # polling for it starts this process's workers
+    deadline = time.monotonic() + 5
+    while queue.get("old")["status"] != "done":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_idle_workers_do_not_take_the_write_lock(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler=lambda payload, blob: {})
+    statements = []
+    connect = queue._connect
+
+    def traced_connect():
+        conn = connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(queue, "_connect", traced_connect)
+    assert queue._claim() is None
+    assert statements and not any(s.startswith(("BEGIN", "UPDATE")) for s in statements)
+
+
+def test_worker_survives_finish_failure(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler=lambda payload, blob: payload, concurrency=1, poll_interval=0.05)
+    real_finish = queue._finish
+
+    def flaky_finish(job_id, result=None, error=None):
+        # fails for the first job whether it is recorded as done or as failed
+        if (result or {}).get("n") == 1 or error:
+            raise RuntimeError("disk full")
+        real_finish(job_id, result=result, error=error)
+
+    monkeypatch.setattr(queue, "_finish", flaky_finish)
+    queue.submit({"n": 1})
+    second = queue.submit({"n": 2})
+    deadline = time.monotonic() + 5
+    while queue.get(second)["status"] != "done":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_abandoned_handlers_are_capped(tmp_path):
+    release = threading.Event()
+    queue = JobQueue(
+        str(tmp_path / "jobs.sqlite3"),
+        handler=lambda payload, blob: release.wait(5) and {},
+        concurrency=1,
+        timeout=0.1,
+        max_abandoned=1,
+        poll_interval=0.05,
+    )
+    first = queue.submit({})
+    second = queue.submit({})
+    try:
+        deadline = time.monotonic() + 5
+        while queue.get(first)["status"] != "failed":
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        time.sleep(0.3)
+        assert queue.abandoned() == 1
+        assert queue.get(second)["status"] == "queued"
+    finally:
+        release.set()
+    deadline = time.monotonic() + 5
+    while queue.get(second)["status"] == "queued":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert queue.abandoned() == 0
@@ -0,0 +1,64 @@
+# tests/test_prompt.py
+from bench.synthetic import BOILERPLATE, make_jd
+from utils import text_analysis
+from utils.prompt import fit_budget, is_heading, normalize_lines, strip_boilerplate
+
+
+def kept(lines):
+    return strip_boilerplate(lines)[0]
+
+
+def test_requirement_lines_starting_with_about_are_kept():
+    lines = [
+        "Requirements:",
+        "About 3 years of Spark experience",
+        "About five years building data pipelines",
+        "Experience with Airflow",
+    ]
+    assert kept(lines) == lines
+    assert not is_heading("About 3 years of Spark experience")
+
+
+def test_requirements_mentioning_benefit_terms_are_kept():
+    lines = [
+        "Responsibilities:",
+        "Experience with dental practice-management software",
+        "Built background check integrations for onboarding flows",
+        "Migrated 401k plan data between recordkeepers",
+        "Familiarity with vision models and PTO accrual rules",
+    ]
+    assert kept(lines) == lines
+
+
+def test_boilerplate_sections_and_sentences_are_dropped():
+    lines = [
+        "About Us",
+        "We are a fast-growing fintech on a mission.",
+        "Requirements:",
+        "5+ years of Python",
+        "We offer medical, dental and vision insurance.",
+        "Offers are contingent upon a background check.",
+        "We are an equal opportunity employer.",
+        "Benefits:",
+        "Generous 401(k) match",
+        "Unlimited PTO",
+        "Life at Acme Corp",
+        "Hack weeks every quarter.",
+    ]
+    out, dropped = strip_boilerplate(lines)
+    assert out == ["Requirements:", "5+ years of Python"]
+    assert dropped == len(lines) - 2
+
+
+def test_synthetic_boilerplate_lines_are_dropped():
+    lines = ["Requirements:", "Experience with SQL", *BOILERPLATE]
+    assert kept(lines) == ["Requirements:", "Experience with SQL"]
+
+
+def test_fit_budget_does_not_fill_the_analysis_cache():
+    lines = normalize_lines(make_jd(12, seed=3))
+    before = len(text_analysis._cache)
+    out, dropped = fit_budget(lines, token_budget=80)
+    assert dropped > 0
+    assert set(out) <= set(lines)
+    assert len(text_analysis._cache) == before
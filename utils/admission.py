@@ -0,0 +1,213 @@
+# utils/admission.py
+import fcntl
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Callable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    """Request refused before any work was done; `status` is 429 or 503."""
+
+    def __init__(self, status: int, reason: str, retry_after: float, message: str):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, int(self.retry_after + 0.999)))
+
+
+class Slot:
+    """A held lock file; released explicitly or when the process dies."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def release(self):
+        if self._fd is not None:
+            os.ftruncate(self._fd, 0)
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SlotPool:
+    """
+    `size` slots shared by every worker on the box, one lock file each. flock
+    locks belong to the open file, so threads, processes and crashed workers
+    (the kernel drops their locks) all behave without any bookkeeping.
+
+    A holder also writes its pid into the file (cleared on release), so
+    in_use can count busy slots by reading, never by locking.
+    """
+
+    def __init__(self, directory: str, prefix: str, size: int):
+        self.size = size
+        self.paths = [os.path.join(directory, f"{prefix}-{i}.lock") for i in range(size)]
+
+    def try_acquire(self) -> Optional[Slot]:
+        # start at a random slot so workers don't all contend for slot 0
+        start = random.randrange(self.size) if self.size else 0
+        for i in range(self.size):
+            fd = os.open(self.paths[(start + i) % self.size], os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            os.pwrite(fd, b"%10d" % os.getpid(), 0)  # fixed width: overwrites a dead holder's pid whole
+            return Slot(fd)
+        return None
+
+    def in_use(self) -> int:
+        """Slots currently held, from the pids in the lock files (a dead holder's slot is free)."""
+        busy = 0
+        for path in self.paths:
+            try:
+                with open(path, "rb") as f:
+                    pid = int(f.read() or 0)
+            except (OSError, ValueError):
+                continue
+            if pid and _alive(pid):
+                busy += 1
+        return busy
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ConcurrencyLimiter:
+    """
+    At most max_inflight expensive requests at once across all workers, plus
+    a short line of at most max_waiting more that poll for a free slot for up
+    to max_wait seconds. Anything beyond that is refused at once, so a slow
+    upstream can't tie up every worker and starve the cheap routes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_inflight: int = 8,
+        max_waiting: int = 2,
+        max_wait: float = 1.0,
+        poll_interval: float = 0.05,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.max_inflight = max_inflight
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._running = SlotPool(directory, "inflight", max_inflight)
+        self._waiting = SlotPool(directory, "waiting", max_waiting)
+        self._sleep = sleep
+
+    def acquire(self) -> Tuple[Slot, float]:
+        """(slot, seconds waited); raises Rejected(503) when full or after max_wait."""
+        slot = self._running.try_acquire()
+        if slot is not None:
+            return slot, 0.0
+
+        place = self._waiting.try_acquire()
+        if place is None:
+            raise Rejected(503, "busy", self.max_wait, "The server is busy. Please try again in a few seconds.")
+        start = time.monotonic()
+        try:
+            while time.monotonic() - start < self.max_wait:
+                self._sleep(self.poll_interval * random.uniform(0.5, 1.5))
+                slot = self._running.try_acquire()
+                if slot is not None:
+                    return slot, time.monotonic() - start
+        finally:
+            place.release()
+        raise Rejected(503, "wait_timeout", self.max_wait, "The server is busy. Please try again in a few seconds.")
+
+    def stats(self) -> dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_waiting": self.max_waiting,
+            "inflight": self._running.in_use(),
+            "waiting": self._waiting.in_use(),
+        }
+
+
+class RateLimiter:
+    """
+    Token buckets per client key in a SQLite file shared by all workers:
+    `burst` tokens, refilled at `per_minute` per minute, one per request.
+    """
+
+    def __init__(self, path: str, per_minute: float = 20, burst: int = 10, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._clock = clock
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _init_db(self):
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets ("
+                    " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+        except sqlite3.Error as e:
+            log.warning("rate limiter store unavailable: %s", e)
+
+    def _sweep(self, conn, now: float):
+        # a bucket idle long enough to have refilled is the same as no row
+        conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - self.burst / self.rate,))
+
+    def take(self, key: str):
+        """Spend one token for `key`; raises Rejected(429) when its bucket is empty."""
+        now = self._clock()
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                    tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                    allowed = tokens >= 1
+                    if allowed:
+                        tokens -= 1
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                        (key, tokens, now),
+                    )
+                    with self._lock:
+                        self._calls += 1
+                        sweep = self._calls % 1000 == 0
+                    if sweep:
+                        self._sweep(conn, now)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            # fail open: a broken limiter store must not take the site down
+            log.warning("rate limiter check failed: %s", e)
+            return
+        if not allowed:
+            raise Rejected(429, "rate_limited", (1 - tokens) / self.rate, "Too many requests. Please slow down.")
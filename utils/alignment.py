@@ -1,11 +1,6 @@
-import re
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, List, Union
 
-# Keep this stopword list simple + stable
-STOPWORDS = set("""
-a an the and or but if then else for to of in on with by from as at is are was were be been being
-this that these those it its i you we they he she them our your my
-""".split())
+from utils.text_analysis import ALIGNMENT_STOPWORDS as STOPWORDS, TextAnalysis, alignment_tokens
 
 def normalize_tokens(text: str) -> List[str]:
     """
@@ -14,20 +9,30 @@ def normalize_tokens(text: str) -> List[str]:
     """
     if not text:
         return []
+    return alignment_tokens(text)
 
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    tokens = [t for t in text.split() if t not in STOPWORDS and len(t) > 2]
-    return tokens
+def term_set(text: Union[str, TextAnalysis]) -> FrozenSet[str]:
+    """
+    Unique alignment terms of a text. Plain strings are tokenized on the spot;
+    pass analyze(text) for a text that is compared more than once.
+    """
+    if isinstance(text, TextAnalysis):
+        return text.unigrams
+    return frozenset(alignment_tokens(text))
 
-def alignment_facts(resume_text: str, jd_text: str, top_n: int = 25) -> Dict[str, object]:
+def alignment_facts(
+    resume_text: Union[str, TextAnalysis],
+    jd_text: Union[str, TextAnalysis],
+    top_n: int = 25,
+) -> Dict[str, object]:
     """
     Directional JD alignment facts:
     - score is % of JD terms covered by resume terms
     - returns facts (for comparison before vs after)
+    - texts may be pre-analyzed (utils.text_analysis.analyze) to skip re-tokenizing
     """
-    resume_terms: Set[str] = set(normalize_tokens(resume_text))
-    jd_terms: Set[str] = set(normalize_tokens(jd_text))
+    resume_terms = term_set(resume_text)
+    jd_terms = term_set(jd_text)
 
     matched = sorted(resume_terms.intersection(jd_terms))
     missing = sorted(jd_terms.difference(resume_terms))
@@ -44,4 +49,4 @@ def alignment_facts(resume_text: str, jd_text: str, top_n: int = 25) -> Dict[str
         # Keep these for backend/debug only (UI can choose to hide)
         "matched_preview": matched[:top_n],
         "missing_preview": missing[:top_n],
-    }
\ No newline at end of file
+    }
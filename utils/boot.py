@@ -0,0 +1,83 @@
+# utils/boot.py
+import gc
+import os
+import resource
+import sys
+import time
+from typing import Dict
+
+_SAMPLE_RESUME = """JANE DOE
+jane@example.com | (555) 010-2030 | Austin, TX
+
+SUMMARY
+Engineer building data pipelines with Python, SQL and Spark.
+
+PROFESSIONAL EXPERIENCE
+Acme Corp - Senior Engineer
+Jan 2020 - Present
+- Built streaming ingestion with Kafka and Airflow, cutting latency by 40%
+
+TECHNICAL SKILLS
+- Languages: Python, SQL, Go
+"""
+
+
+def memory() -> Dict[str, int]:
+    """
+    This process's memory in KiB: rss, plus pss/shared/private where the
+    kernel reports them (/proc/self/smaps_rollup). Shared pages are the ones
+    still copy-on-write with the gunicorn master.
+    """
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    out[key.lower()] = int(rest.split()[0])
+        out["shared"] = out.pop("shared_clean", 0) + out.pop("shared_dirty", 0)
+        out["private"] = out.pop("private_clean", 0) + out.pop("private_dirty", 0)
+    except (OSError, ValueError, IndexError):
+        # no procfs (macOS...): peak RSS is the best available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        out["rss"] = peak // 1024 if sys.platform == "darwin" else peak
+    return out
+
+
+def report(stage: str, seconds: float = None):
+    """Print import/boot time and memory for this process to stderr (gunicorn's error log)."""
+    mem = " ".join(f"{k}={v // 1024}MiB" for k, v in memory().items())
+    took = f" in {seconds:.3f}s" if seconds is not None else ""
+    print(f"boot {stage} pid={os.getpid()}{took} modules={len(sys.modules)} {mem}", file=sys.stderr, flush=True)
+
+
+def warm_up() -> float:
+    """
+    Load everything read-only that every worker will need, once, before
+    gunicorn forks (run under --preload), so workers share it copy-on-write:
+    the lazily imported readers/writers and google.generativeai, both render
+    templates, font metrics, regexes and text-analysis tables. No network
+    client is created here; see app.get_model().
+    """
+    start = time.perf_counter()
+
+    import docx  # noqa: F401
+    import google.generativeai  # noqa: F401  (module only; clients are per worker)
+    import PyPDF2  # noqa: F401
+
+    from utils import renderer
+    from utils.alignment import alignment_facts
+    from utils.output_cleaner import clean_output
+    from utils.templates import PDF_TEMPLATES, warm_templates
+
+    warm_templates()
+    for template in PDF_TEMPLATES:
+        for fmt in renderer.FORMATS:
+            renderer.render_bytes(_SAMPLE_RESUME, template, fmt)
+    alignment_facts(clean_output(_SAMPLE_RESUME), _SAMPLE_RESUME)
+
+    # move everything allocated so far out of the GC's reach: collections in
+    # the workers would otherwise write to these objects and un-share their pages
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - start
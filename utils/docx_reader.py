@@ -1,9 +1,29 @@
-from docx import Document
+import threading
+from typing import Optional
 
-def extract_text_from_docx(file_storage) -> str:
+from cachetools import LRUCache
+
+_cache = LRUCache(maxsize=256)
+_lock = threading.Lock()
+
+def extract_text_from_docx(file_storage, content_hash: Optional[str] = None) -> str:
     """
     Extract plain text from a .docx FileStorage object (Flask upload).
+    With content_hash (from utils.upload), re-uploads of the same file skip parsing.
     """
+    if content_hash is not None:
+        with _lock:
+            text = _cache.get(content_hash)
+        if text is not None:
+            return text
+
+    from docx import Document  # imported on first use; keeps worker boot light
+
     doc = Document(file_storage)
     lines = [p.text.strip() for p in doc.paragraphs if p.text and p.text.strip()]
-    return "\n".join(lines)
\ No newline at end of file
+    text = "\n".join(lines)
+
+    if content_hash is not None:
+        with _lock:
+            _cache[content_hash] = text
+    return text
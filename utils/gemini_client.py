@@ -0,0 +1,273 @@
+# utils/gemini_client.py
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limited, or the service had a bad moment.
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiError(RuntimeError):
+    """Gemini call failed after retries, or was refused without trying."""
+
+
+class CircuitOpenError(GeminiError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"The AI service is unavailable right now. Try again in {max(1, round(retry_after))}s.")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(GeminiError):
+    def __init__(self, deadline: float):
+        super().__init__(f"The AI service did not answer within {deadline:g}s.")
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status behind an exception: google.api_core errors carry .code, requests errors a response."""
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_transient(exc: BaseException) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code in TRANSIENT_STATUS
+    # no status: socket-level failures (connection reset, read timeout) are
+    # OSErrors, including the requests exceptions the REST transport raises
+    return isinstance(exc, OSError)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive transient
+    failures it opens and refuses calls for `reset_timeout` seconds, then lets
+    a single probe through (half-open): success closes it, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError if calls are currently refused."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = self._clock() - self._opened_at
+            if waited < self.reset_timeout or self._probing:
+                raise CircuitOpenError(max(0.0, self.reset_timeout - waited))
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log.warning("gemini circuit opened after %d consecutive failures", self._failures)
+                self._opened_at = self._clock()
+
+
+class GeminiClient:
+    """
+    Wrapper around a GenerativeModel (from `model_factory`, called per use so
+    the per-process, fork-safe client is always the current one) that adds:
+    - a per-attempt timeout and an overall deadline across retries;
+    - retries of transient errors (429/5xx, connection errors) with full-jitter
+      exponential backoff;
+    - a circuit breaker that fails fast while the service is down;
+    - singleflight: identical concurrent prompts share one upstream call and
+      every caller gets the same text.
+
+    on_event(name) is told about "retry", "circuit_open", "coalesced" and "deadline".
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], object],
+        timeout: float = 60.0,
+        deadline: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+        on_event: Optional[Callable[[str], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.model_factory = model_factory
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._on_event = on_event
+        self._sleep = sleep
+        self._clock = clock
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _event(self, name: str):
+        if self._on_event is not None:
+            self._on_event(name)
+
+    # -- retries -----------------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _attempt(self, call: Callable[[float], object]):
+        """Run call(timeout) under the breaker, retrying transient failures until the deadline."""
+        deadline = self._clock() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._event("circuit_open")
+                raise
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                self._event("deadline")
+                raise DeadlineExceeded(self.deadline)
+            try:
+                result = call(min(self.timeout, remaining))
+            except Exception as e:
+                if not is_transient(e):
+                    # the service answered (bad request, blocked prompt...): it's up
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries:
+                    raise
+                if self._clock() + delay >= deadline:
+                    self._event("deadline")
+                    raise DeadlineExceeded(self.deadline) from e
+                attempt += 1
+                log.info("gemini transient error (%s), retry %d in %.2fs", e, attempt, delay)
+                self._event("retry")
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    # -- singleflight ------------------------------------------------------
+
+    def _join(self, prompt: str):
+        """(key, future, owner): the first caller for a prompt owns the call; later ones wait on its future."""
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is not None:
+                return key, pending, False
+            pending = self._inflight[key] = Future()
+            return key, pending, True
+
+    def _wait(self, pending: Future) -> str:
+        self._event("coalesced")
+        try:
+            return pending.result(timeout=self.deadline)
+        except FutureTimeout:
+            self._event("deadline")
+            raise DeadlineExceeded(self.deadline)
+
+    def _settle(self, key: str, pending: Future, text: str = None, exc: BaseException = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exc is None:
+            pending.set_result(text)
+        else:
+            pending.set_exception(exc)
+
+    # -- calls -------------------------------------------------------------
+
+    def generate(self, prompt: str) -> str:
+        """Full response text for `prompt`."""
+        key, pending, owner = self._join(prompt)
+        if not owner:
+            return self._wait(pending)
+
+        def call(timeout):
+            response = self.model_factory().generate_content(prompt, request_options={"timeout": timeout})
+            return response.text or ""
+
+        try:
+            text = self._attempt(call)
+        except BaseException as e:
+            self._settle(key, pending, exc=e)
+            raise
+        self._settle(key, pending, text)
+        return text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield text chunks as they arrive. Only opening the stream (up to the
+        first chunk) is retried; once text has been handed out a failure is
+        raised as is. A caller that joins an identical in-flight request gets
+        the finished text as a single chunk.
+        """
+        key, pending, owner = self._join(prompt)
+        if not owner:
+            yield self._wait(pending)
+            return
+
+        def call(timeout):
+            chunks = iter(self.model_factory().generate_content(prompt, stream=True, request_options={"timeout": timeout}))
+            first = next(chunks, None)  # connection and quota errors surface here
+            return first, chunks
+
+        parts = []
+        try:
+            first, chunks = self._attempt(call)
+            if first is not None:
+                for chunk in _chain(first, chunks):
+                    text = chunk.text or ""
+                    parts.append(text)
+                    yield text
+        except GeneratorExit:
+            self._settle(key, pending, exc=GeminiError("Generation was abandoned."))
+            raise
+        except BaseException as e:
+            if parts and is_transient(e):
+                self.breaker.record_failure()  # broke mid-stream; opening failures were counted already
+            self._settle(key, pending, exc=e)
+            raise
+        self._settle(key, pending, "".join(parts))
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
@@ -0,0 +1,275 @@
+# utils/jd_corpus.py
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from utils.alignment import term_set
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """One version of the in-memory index. Published whole and never mutated, so readers need no lock."""
+    version: Optional[int]
+    index: Dict[str, Set[int]]              # term -> posting ids
+    doc_terms: Dict[int, FrozenSet[str]]    # posting id -> its terms
+    titles: Dict[int, str]
+    log_df: Dict[int, float]                # posting id -> sum(log(df + 1)) over its terms (IDF only)
+
+
+_EMPTY = _Snapshot(None, {}, {}, {}, {})
+
+
+class JDCorpus:
+    """
+    Persistent inverted index over job postings.
+
+    Postings are tokenized once (same normalizer as alignment_facts) and
+    stored as (term, posting) rows in SQLite. Each process keeps an
+    in-memory copy (term -> posting ids) and reloads it only when another
+    worker has changed the corpus, so ranking touches just the postings
+    that share a term with the resume.
+
+    Score = weighted share of a posting's terms that the resume covers
+    (the alignment_facts score, optionally IDF-weighted), 0-100.
+
+    A posting's IDF weight is sum(log((N + 1) / (df + 1)) + 1) over its terms,
+    i.e. len(terms) * (log(N + 1) + 1) - sum(log(df + 1)). The second sum is
+    kept per posting; each add_many/remove applies all its index changes
+    first and then shifts the sum once per changed term, for the postings
+    that keep that term.
+
+    Writers build a new snapshot (copy-on-write: only the posting lists they
+    touch are copied) and publish it; rank reads whichever snapshot is
+    current and never waits on a writer.
+
+    Terms in more than max_df of the postings ("experience", "team"...) are
+    treated like stopwords when ranking: they still count towards a
+    posting's weight but never as a match, so rank doesn't walk their
+    posting lists, which are most of the index. 1.0 matches every term.
+    """
+
+    def __init__(self, path: str, use_idf: bool = True, max_df: float = 0.5):
+        self.path = path
+        self.use_idf = use_idf
+        self.max_df = max_df
+        self._lock = threading.Lock()
+        self._snap = _EMPTY
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,"
+                " text TEXT NOT NULL, added_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS posting_terms ("
+                " term TEXT NOT NULL, posting_id INTEGER NOT NULL,"
+                " PRIMARY KEY (term, posting_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS posting_terms_posting ON posting_terms (posting_id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS corpus_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO corpus_meta (key, value) VALUES ('version', 0)")
+
+    # ---------- in-memory index ----------
+
+    def _db_version(self, conn) -> int:
+        return conn.execute("SELECT value FROM corpus_meta WHERE key = 'version'").fetchone()[0]
+
+    def _bump(self, conn) -> int:
+        conn.execute("UPDATE corpus_meta SET value = value + 1 WHERE key = 'version'")
+        return self._db_version(conn)
+
+    def _log_df_sum(self, index: Dict[str, Set[int]], terms: Iterable[str]) -> float:
+        return math.fsum(math.log(len(index[t]) + 1) for t in terms)
+
+    def _refresh(self):
+        """Reload from disk if another process changed the corpus (caller holds the lock)."""
+        with closing(self._connect()) as conn:
+            version = self._db_version(conn)
+            if version == self._snap.version:
+                return
+            index = defaultdict(set)
+            doc_terms = defaultdict(set)
+            for term, posting_id in conn.execute("SELECT term, posting_id FROM posting_terms"):
+                index[term].add(posting_id)
+                doc_terms[posting_id].add(term)
+            titles = dict(conn.execute("SELECT id, title FROM postings"))
+
+        index = dict(index)
+        doc_terms = {pid: frozenset(doc_terms.get(pid, ())) for pid in titles}
+        log_df = {}
+        if self.use_idf:
+            log_df = {pid: self._log_df_sum(index, terms) for pid, terms in doc_terms.items()}
+        self._snap = _Snapshot(version, index, doc_terms, titles, log_df)
+
+    def _current(self) -> _Snapshot:
+        """The snapshot to read, reloaded first if the corpus changed on disk."""
+        snap = self._snap
+        with closing(self._connect()) as conn:
+            version = self._db_version(conn)
+        if version != snap.version:
+            with self._lock:
+                self._refresh()
+                snap = self._snap
+        return snap
+
+    def _idf(self, df: int, n: int) -> float:
+        if not self.use_idf:
+            return 1.0
+        return math.log((n + 1) / (df + 1)) + 1.0
+
+    def _doc_weight(self, snap: _Snapshot, pid: int) -> float:
+        n_terms = len(snap.doc_terms.get(pid, ()))
+        if not self.use_idf:
+            return float(n_terms)
+        return n_terms * (math.log(len(snap.doc_terms) + 1) + 1.0) - snap.log_df.get(pid, 0.0)
+
+    def _apply(
+        self,
+        version: int,
+        added: Iterable[Tuple[int, str, FrozenSet[str]]] = (),
+        removed: Iterable[int] = (),
+    ):
+        """
+        Publish the snapshot with these postings added/removed, or reload it if
+        another worker changed the corpus meanwhile (caller holds the lock).
+        """
+        base = self._snap
+        if version != base.version + 1:
+            self._refresh()
+            return
+
+        index, doc_terms, titles = dict(base.index), dict(base.doc_terms), dict(base.titles)
+        before: Dict[str, Set[int]] = {}  # touched term -> its posting ids in `base`
+
+        def postings(term: str) -> Set[int]:
+            if term not in before:
+                before[term] = base.index.get(term, set())
+                index[term] = set(before[term])
+            return index[term]
+
+        for posting_id in removed:
+            for t in doc_terms.pop(posting_id, ()):
+                postings(t).discard(posting_id)
+            titles.pop(posting_id, None)
+        for posting_id, title, terms in added:
+            for t in terms:
+                postings(t).add(posting_id)
+            doc_terms[posting_id] = terms
+            titles[posting_id] = title
+        for t in before:
+            if not index[t]:
+                del index[t]
+
+        log_df = {}
+        if self.use_idf:
+            log_df = {pid: s for pid, s in base.log_df.items() if pid in doc_terms}
+            # one shift per changed term, for the postings that already had it
+            for t, ids in before.items():
+                after = index.get(t, ())
+                shift = math.log(len(after) + 1) - math.log(len(ids) + 1)
+                if shift:
+                    for pid in after:
+                        if pid in log_df:
+                            log_df[pid] += shift
+            for posting_id, _, terms in added:
+                log_df[posting_id] = self._log_df_sum(index, terms)
+
+        self._snap = _Snapshot(version, index, doc_terms, titles, log_df)
+
+    # ---------- public API ----------
+
+    def add(self, title: str, text: str) -> int:
+        return self.add_many([{"title": title, "text": text}])[0]
+
+    def add_many(self, postings: Iterable[Dict[str, str]]) -> List[int]:
+        """Ingest postings in one transaction; each is tokenized exactly once."""
+        prepared = [
+            ((p.get("title") or "").strip() or "Untitled posting", p["text"], term_set(p["text"]))
+            for p in postings
+        ]
+        added = []
+        with self._lock:
+            self._refresh()
+            with closing(self._connect()) as conn, conn:
+                now = time.time()
+                for title, text, terms in prepared:
+                    cur = conn.execute(
+                        "INSERT INTO postings (title, text, added_at) VALUES (?, ?, ?)",
+                        (title, text, now),
+                    )
+                    conn.executemany(
+                        "INSERT INTO posting_terms (term, posting_id) VALUES (?, ?)",
+                        ((t, cur.lastrowid) for t in terms),
+                    )
+                    added.append((cur.lastrowid, title, frozenset(terms)))
+                version = self._bump(conn)
+            self._apply(version, added=added)
+        return [posting_id for posting_id, _, _ in added]
+
+    def remove(self, posting_id: int) -> bool:
+        with self._lock:
+            self._refresh()
+            with closing(self._connect()) as conn, conn:
+                cur = conn.execute("DELETE FROM postings WHERE id = ?", (posting_id,))
+                if cur.rowcount == 0:
+                    return False
+                conn.execute("DELETE FROM posting_terms WHERE posting_id = ?", (posting_id,))
+                version = self._bump(conn)
+            self._apply(version, removed=[posting_id])
+        return True
+
+    def rank(self, resume_text: str, k: int = 10, resume_terms: Optional[Set[str]] = None) -> List[Dict[str, object]]:
+        """Top-k postings for a resume, best first."""
+        if resume_terms is None:
+            resume_terms = term_set(resume_text)
+        snap = self._current()
+        n = len(snap.doc_terms)
+        max_df = self.max_df * n
+
+        scores = defaultdict(float)
+        matched = defaultdict(int)
+        for term in resume_terms:
+            ids = snap.index.get(term)
+            if not ids or len(ids) > max_df:
+                continue
+            w = self._idf(len(ids), n)
+            for pid in ids:
+                scores[pid] += w
+                matched[pid] += 1
+
+        top = heapq.nlargest(
+            k,
+            ((score / weight, pid) for pid, score in scores.items() if (weight := self._doc_weight(snap, pid)) > 0),
+        )
+        return [
+            {
+                "id": pid,
+                "title": snap.titles.get(pid, ""),
+                "score": round(ratio * 100),
+                "matched_count": matched[pid],
+                "jd_terms_count": len(snap.doc_terms.get(pid, ())),
+            }
+            for ratio, pid in top
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        snap = self._current()
+        return {
+            "postings": len(snap.doc_terms),
+            "terms": len(snap.index),
+            "version": snap.version,
+            "idf": self.use_idf,
+        }
@@ -0,0 +1,273 @@
+# utils/jobs.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Durable local job queue for slow tailoring work.
+
+    Jobs live in a SQLite file, so any gunicorn worker can enqueue, run or
+    report on any job, and queued work survives a restart. Each process
+    runs `concurrency` worker threads that claim jobs one at a time; they
+    start on the first submit or get in the process, so workers that never
+    see a job request run none (jobs left queued by a restart start once
+    their client polls for them, or on the next submit). An idle worker
+    only reads: it takes the write lock once there is something to claim.
+
+    A handler that overruns `timeout` can't be killed, so its thread is
+    abandoned. While `max_abandoned` of those are still running in this
+    process the workers stop claiming new jobs (other processes pick them up,
+    or they wait until the stuck calls return).
+
+    handler(payload: dict, blob: bytes) -> dict   (must be JSON-serializable)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handler: Callable[[Dict, bytes], Dict],
+        concurrency: int = 2,
+        timeout: float = 120,
+        retention: float = 3600,
+        max_finished: int = 1000,
+        max_attempts: int = 2,
+        poll_interval: float = 0.5,
+        max_abandoned: Optional[int] = None,
+    ):
+        self.path = path
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retention = retention
+        self.max_finished = max_finished
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.max_abandoned = self.concurrency if max_abandoned is None else max_abandoned
+
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+        self._started_pid = None
+        self._last_sweep = 0.0
+        self._abandoned = set()
+        self._abandoned_lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _init_db(self):
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+                " payload TEXT NOT NULL, blob BLOB,"
+                " result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    # ---------- producer side ----------
+
+    def submit(self, payload: Dict, blob: bytes = b"") -> str:
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, blob, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), blob, time.time()),
+            )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, object]]:
+        self.start()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "result": json.loads(row[2]) if row[2] else None,
+            "error": row[3],
+            "attempts": row[4],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7],
+        }
+
+    def counts(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    # ---------- consumer side ----------
+
+    def start(self):
+        """Start worker threads in this process (lazy, so it is safe with gunicorn --preload)."""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._start_lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+            self._wake = threading.Event()
+            self._abandoned = set()
+            for i in range(self.concurrency):
+                t = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                t.start()
+
+    def _claimable(self, conn, now: float) -> bool:
+        """Anything queued or expired, by a plain read (no write lock while the queue is idle)."""
+        row = conn.execute(
+            "SELECT 1 FROM jobs WHERE status = ? OR (status = ? AND started_at < ?) LIMIT 1",
+            (QUEUED, RUNNING, now - self.timeout * 2),
+        ).fetchone()
+        return row is not None
+
+    def _claim(self):
+        with closing(self._connect()) as conn:
+            if not self._claimable(conn, time.time()):
+                return None
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            try:
+                # jobs whose worker died (or hung past the deadline) go back in the queue
+                conn.execute(
+                    "UPDATE jobs SET status = ? WHERE status = ? AND started_at < ? AND attempts < ?",
+                    (QUEUED, RUNNING, now - self.timeout * 2, self.max_attempts),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = 'worker lost', finished_at = ?, blob = NULL"
+                    " WHERE status = ? AND started_at < ?",
+                    (FAILED, now, RUNNING, now - self.timeout * 2),
+                )
+                row = conn.execute(
+                    "SELECT id, payload, blob FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (RUNNING, now, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, blob = NULL WHERE id = ?",
+                (
+                    FAILED if error else DONE,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def _run_with_timeout(self, payload: Dict, blob: bytes) -> Dict:
+        box = {}
+
+        def target():
+            try:
+                box["result"] = self.handler(payload, blob)
+            except Exception as e:  # surfaced to the job record below
+                box["error"] = e
+
+        t = threading.Thread(target=target, daemon=True)
+        t.start()
+        t.join(self.timeout)
+        if t.is_alive():
+            # Python threads can't be killed; the call is abandoned and its result dropped.
+            with self._abandoned_lock:
+                self._abandoned.add(t)
+            raise JobTimeout(f"Job exceeded {self.timeout:g}s timeout.")
+        if "error" in box:
+            raise box["error"]
+        return box["result"]
+
+    def abandoned(self) -> int:
+        """Timed-out handler threads in this process that are still running."""
+        with self._abandoned_lock:
+            self._abandoned = {t for t in self._abandoned if t.is_alive()}
+            return len(self._abandoned)
+
+    def _worker_loop(self):
+        while True:
+            try:
+                self._work_once()
+            except Exception:
+                # nothing may kill a worker thread; the job (if any) is retried once its claim expires
+                log.exception("job worker error")
+                self._wake.wait(self.poll_interval)
+
+    def _work_once(self):
+        stuck = self.abandoned()
+        if stuck >= self.max_abandoned:
+            log.warning("%d timed-out jobs still running; not claiming new jobs", stuck)
+            time.sleep(self.poll_interval)
+            return
+
+        try:
+            self._sweep()
+            row = self._claim()
+        except sqlite3.Error as e:
+            log.warning("job queue unavailable: %s", e)
+            row = None
+
+        if row is None:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            return
+
+        job_id, payload, blob = row
+        try:
+            result = self._run_with_timeout(json.loads(payload), blob or b"")
+        except Exception as e:
+            log.warning("job %s failed: %s", job_id, e)
+            self._finish(job_id, error=f"Error: {str(e)}")
+            return
+        self._finish(job_id, result=result)
+
+    def _sweep(self):
+        """Evict finished jobs past retention, and keep at most max_finished of them."""
+        now = time.time()
+        if now - self._last_sweep < 30:
+            return
+        self._last_sweep = now
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, now - self.retention),
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE id IN ("
+                " SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (DONE, FAILED, self.max_finished),
+            )
@@ -0,0 +1,130 @@
+# utils/llm_cache.py
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+
+log = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-extracted copies of the same document hash the same."""
+    return " ".join((text or "").split())
+
+
+class TailorCache:
+    """
+    Two-tier cache for LLM generations:
+    - tier 1: in-process LRU/TTL (per gunicorn worker)
+    - tier 2: SQLite file on local disk (shared by every worker on the box)
+
+    Keys are content hashes of the normalized inputs plus `version`
+    (prompt version + model name), so a prompt change never serves stale text.
+    """
+
+    def __init__(self, path: str, version: str, maxsize: int = 256, ttl: int = 3600, disk_ttl: int = 7 * 86400):
+        self.path = path
+        self.version = version
+        self.disk_ttl = disk_ttl
+        self._mem = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS generations ("
+                    " key TEXT PRIMARY KEY, version TEXT NOT NULL,"
+                    " value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                # expired rows are never served; drop them whenever a worker boots
+                conn.execute("DELETE FROM generations WHERE created_at <= ?", (time.time() - self.disk_ttl,))
+        except sqlite3.Error as e:
+            log.warning("tailor cache disk tier unavailable: %s", e)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def key(self, *parts: str) -> str:
+        h = hashlib.sha256(self.version.encode("utf-8"))
+        for part in parts:
+            h.update(b"\x00")
+            h.update(normalize_text(part).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._mem.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT value FROM generations WHERE key = ? AND version = ? AND created_at > ?",
+                    (key, self.version, time.time() - self.disk_ttl),
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("tailor cache read failed: %s", e)
+            self._count("errors")
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        with self._lock:
+            self._mem[key] = row[0]
+        self._count("disk_hits")
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._mem[key] = value
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO generations (key, version, value, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.version, value, time.time()),
+                )
+            self._count("writes")
+        except sqlite3.Error as e:
+            log.warning("tailor cache write failed: %s", e)
+            self._count("errors")
+
+    def invalidate(self, all_versions: bool = False) -> int:
+        """
+        Drop cached generations. By default only rows from other prompt/model
+        versions are removed; pass all_versions=True to wipe everything.
+        """
+        with self._lock:
+            self._mem.clear()
+        with closing(self._connect()) as conn, conn:
+            if all_versions:
+                cur = conn.execute("DELETE FROM generations")
+            else:
+                cur = conn.execute("DELETE FROM generations WHERE version != ?", (self.version,))
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["memory_size"] = len(self._mem)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        counters["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        counters["version"] = self.version
+        return counters
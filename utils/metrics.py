@@ -0,0 +1,184 @@
+# utils/metrics.py
+import contextvars
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# (stage, seconds) recorded during the current request, for the Server-Timing header
+_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("timings", default=None)
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _label_str(labels: Dict[str, str], **extra) -> str:
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + body + "}"
+
+
+class Metrics:
+    """
+    Prometheus counters and histograms aggregated across gunicorn workers.
+
+    Each worker adds increments to an in-memory buffer; every flush_interval
+    seconds (and before every scrape) the buffer is added to a SQLite table
+    shared by all workers on the box (value = value + delta). So /metrics
+    reports the sum over every worker, whichever one serves the scrape, and
+    counts from workers that have since exited are kept.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, prefix: str = ""):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.prefix = prefix
+        self._defs = {}     # name -> (kind, help, buckets)
+        self._pending = {}  # (name, labels json, le) -> delta
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _init_db(self):
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS metric_samples ("
+                    " name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL,"
+                    " value REAL NOT NULL, PRIMARY KEY (name, labels, le))"
+                )
+        except sqlite3.Error as e:
+            log.warning("metrics store unavailable: %s", e)
+
+    # -- definitions -------------------------------------------------------
+
+    def counter(self, name: str, help: str):
+        self._defs[name] = ("counter", help, None)
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self._defs[name] = ("histogram", help, tuple(sorted(buckets)) + (float("inf"),))
+
+    # -- recording ---------------------------------------------------------
+
+    def _add(self, key, value):
+        self._pending[key] = self._pending.get(key, 0) + value
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = json.dumps(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._add((name, key, ""), value)
+
+    def observe(self, name: str, value: float, **labels):
+        _, _, buckets = self._defs[name]
+        key = json.dumps(sorted((k, str(v)) for k, v in labels.items()))
+        # buckets are stored non-cumulative (one row per bucket) and summed on render
+        le = next(b for b in buckets if value <= b)
+        with self._lock:
+            self._add((name, key, _fmt(le)), 1)
+            self._add((name, key, "sum"), value)
+
+    @contextmanager
+    def stage(self, name: str, histogram: str = "stage_seconds"):
+        """Time a block: observed in `histogram` and listed in this request's Server-Timing header."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, time.perf_counter() - start, histogram)
+
+    def timing(self, name: str, seconds: float, histogram: str = "stage_seconds"):
+        """Record a stage timed elsewhere (e.g. on a pool thread running in a copy of the request context)."""
+        self.observe(histogram, seconds, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, seconds))
+
+    # -- per-request Server-Timing -----------------------------------------
+
+    @staticmethod
+    def start_request():
+        return _timings.set([])
+
+    @staticmethod
+    def end_request(token) -> List[Tuple[str, float]]:
+        timings = _timings.get() or []
+        _timings.reset(token)
+        return timings
+
+    @staticmethod
+    def server_timing(timings: Iterable[Tuple[str, float]]) -> str:
+        """Server-Timing header value; repeated stages (e.g. two scoring passes) are summed."""
+        totals = {}
+        for name, seconds in timings:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+    # -- shared store ------------------------------------------------------
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT INTO metric_samples (name, labels, le, value) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value",
+                    [(name, labels, le, value) for (name, labels, le), value in pending.items()],
+                )
+        except sqlite3.Error as e:
+            log.warning("metrics flush failed: %s", e)
+            with self._lock:  # keep the deltas for the next attempt
+                for key, value in pending.items():
+                    self._add(key, value)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def render(self) -> str:
+        """Prometheus text exposition of every worker's samples."""
+        self.flush()
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT name, labels, le, value FROM metric_samples").fetchall()
+
+        series = {}
+        for name, labels, le, value in rows:
+            series.setdefault(name, {}).setdefault(labels, {})[le] = value
+
+        out = []
+        for name, (kind, help, buckets) in self._defs.items():
+            full = self.prefix + name
+            out.append(f"# HELP {full} {help}")
+            out.append(f"# TYPE {full} {kind}")
+            for labels_json, values in sorted(series.get(name, {}).items()):
+                labels = dict(json.loads(labels_json))
+                if kind == "counter":
+                    out.append(f"{full}{_label_str(labels)} {_fmt(values.get('', 0))}")
+                    continue
+                running = 0
+                for b in buckets:
+                    running += values.get(_fmt(b), 0)
+                    out.append(f"{full}_bucket{_label_str(labels, le=_fmt(b))} {_fmt(running)}")
+                out.append(f"{full}_sum{_label_str(labels)} {_fmt(values.get('sum', 0))}")
+                out.append(f"{full}_count{_label_str(labels)} {_fmt(running)}")
+        return "\n".join(out) + "\n"
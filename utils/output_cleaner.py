@@ -0,0 +1,65 @@
+# utils/output_cleaner.py
+import re
+
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*")
+TABLE_ROW_RE = re.compile(r"^\s*\|.*\|\s*$")
+BULLET_RE = re.compile(r"^\s*[•*]\s+")
+
+
+def clean_line(line: str) -> str:
+    """Clean a single line: markdown headings/emphasis, table rows, bullets."""
+    line = HEADING_RE.sub("", line, count=1)  # headings
+    line = line.replace("**", "").replace("__", "").replace("`", "")
+    if TABLE_ROW_RE.match(line):  # remove table rows
+        return ""
+    # bullets -> hyphen
+    return BULLET_RE.sub("- ", line, count=1).rstrip()
+
+
+class StreamingCleaner:
+    """
+    Incremental version of clean_output for streamed LLM text.
+
+    Chunks can split a heading, bullet or table row anywhere, so only
+    complete lines are cleaned; the partial tail is held until the next
+    chunk (or finish()). Blank-line collapsing and the leading strip carry
+    state across chunks, so feed(a) + feed(b) + finish() == clean_output(a + b).
+    """
+
+    def __init__(self):
+        self._tail = ""
+        self._started = False
+        self._pending_blank = False
+
+    def feed(self, chunk: str) -> str:
+        lines = (self._tail + (chunk or "")).split("\n")
+        self._tail = lines.pop()
+        return self._emit(lines)
+
+    def finish(self) -> str:
+        tail, self._tail = self._tail, ""
+        return self._emit([tail]) if tail else ""
+
+    def _emit(self, lines) -> str:
+        out = []
+        for raw in lines:
+            line = clean_line(raw)
+            if not line.strip():
+                # collapse extra blank lines; never lead or trail with one
+                self._pending_blank = self._started
+                continue
+            if not self._started:
+                out.append(line.lstrip())
+                self._started = True
+            else:
+                out.append(("\n\n" if self._pending_blank else "\n") + line)
+            self._pending_blank = False
+        return "".join(out)
+
+
+def clean_output(text: str) -> str:
+    """Strong cleanup: remove markdown, tables, stray symbols."""
+    if not text:
+        return ""
+    cleaner = StreamingCleaner()
+    return cleaner.feed(text) + cleaner.finish()
@@ -1,9 +1,113 @@
-from PyPDF2 import PdfReader
-
-def extract_text_from_pdf(file_stream):
-    reader = PdfReader(file_stream)
-    text = ""
-    for page in reader.pages:
-        if page.extract_text():
-            text += page.extract_text() + "\n"
-    return text.strip()
\ No newline at end of file
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from cachetools import LRUCache
+
+# Budgets protect workers from huge uploads; anything past them is ignored.
+MAX_PAGES = 50
+MAX_CHARS = 200_000
+# Below this many pages a process pool costs more than it saves.
+PARALLEL_MIN_PAGES = 8
+WORKERS = 4
+
+_cache = LRUCache(maxsize=256)
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+
+
+def configure(max_pages: int = MAX_PAGES, max_chars: int = MAX_CHARS, parallel_min_pages: int = PARALLEL_MIN_PAGES, workers: int = WORKERS, cache_size: int = 256):
+    global MAX_PAGES, MAX_CHARS, PARALLEL_MIN_PAGES, WORKERS, _cache
+    MAX_PAGES, MAX_CHARS, PARALLEL_MIN_PAGES, WORKERS = max_pages, max_chars, parallel_min_pages, max(1, workers)
+    with _lock:
+        _cache = LRUCache(maxsize=cache_size)
+
+
+def _page_texts(pages, start: int, stop: int, max_chars: int) -> List[str]:
+    """Extract pages [start, stop) -- each page exactly once."""
+    texts, total = [], 0
+    for i in range(start, stop):
+        text = pages[i].extract_text()
+        if text:
+            texts.append(text)
+            total += len(text)
+            if total >= max_chars:
+                break
+    return texts
+
+
+def _extract_pages(data: bytes, start: int, stop: int, max_chars: int) -> List[str]:
+    """_page_texts for a pool worker, which has only the bytes and parses them itself."""
+    from PyPDF2 import PdfReader  # imported on first use; keeps worker boot light
+
+    return _page_texts(PdfReader(io.BytesIO(data)).pages, start, stop, max_chars)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # lazy + per process (gunicorn forks workers); forkserver avoids forking a threaded worker
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=ctx)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _extract(data: bytes, max_pages: int, max_chars: int) -> str:
+    from PyPDF2 import PdfReader
+
+    pages = PdfReader(io.BytesIO(data)).pages
+    n_pages = min(len(pages), max_pages)
+
+    if n_pages < PARALLEL_MIN_PAGES or WORKERS < 2:
+        texts = _page_texts(pages, 0, n_pages, max_chars)
+    else:
+        step = -(-n_pages // WORKERS)
+        try:
+            pool = _get_pool()
+            futures = [
+                pool.submit(_extract_pages, data, start, min(start + step, n_pages), max_chars)
+                for start in range(0, n_pages, step)
+            ]
+            texts = [t for f in futures for t in f.result()]
+        except BrokenProcessPool:
+            # a pool worker died; rebuild it next time and finish this one inline
+            _reset_pool()
+            texts = _page_texts(pages, 0, n_pages, max_chars)
+
+    return "\n".join(texts).strip()[:max_chars]
+
+
+def extract_text_from_pdf(file_stream, content_hash: Optional[str] = None, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> str:
+    """
+    Extract plain text from a PDF upload (file-like object or bytes).
+    Re-uploads of the same file (same content hash) skip parsing.
+    """
+    data = file_stream if isinstance(file_stream, (bytes, bytearray)) else file_stream.read()
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    max_chars = MAX_CHARS if max_chars is None else max_chars
+
+    key = (content_hash or hashlib.sha256(data).hexdigest(), max_pages, max_chars)
+    with _lock:
+        text = _cache.get(key)
+    if text is None:
+        text = _extract(bytes(data), max_pages, max_chars)
+        with _lock:
+            _cache[key] = text
+    return text
@@ -1,33 +1,83 @@
 # utils/pdf_writer.py
 from reportlab.pdfgen import canvas
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.units import inch
 from reportlab.pdfbase.pdfmetrics import stringWidth
-import re
+
+from utils.templates import get_pdf_template
+from utils.resume_model import BLANK, BULLET, CONTACT, HEADER, SKILL, parse_resume
+
+# Glyph widths in font units (1/1000 em), cached per font: size only scales them.
+_WIDTH_CACHE_MAX = 50000
+_widths = {}
+
+
+def _units(text, font_name):
+    cache = _widths.setdefault(font_name, {})
+    u = cache.get(text)
+    if u is None:
+        u = stringWidth(text, font_name, 1000)
+        r = round(u)
+        if abs(u - r) < 1e-6:  # standard fonts have integer widths; keep sums exact
+            u = r
+        if len(cache) >= _WIDTH_CACHE_MAX:
+            cache.clear()
+        cache[text] = u
+    return u
+
+
+def _split_long_word(word, font_name, scale, max_width):
+    """Break a token wider than max_width (URLs etc.) at character level."""
+    pieces, cur, cur_units = [], "", 0
+    for ch in word:
+        u = _units(ch, font_name)
+        if cur and (cur_units + u) * scale > max_width:
+            pieces.append(cur)
+            cur, cur_units = ch, u
+        else:
+            cur += ch
+            cur_units += u
+    pieces.append(cur)
+    return pieces
+
 
 def _wrap_line(text, font_name, font_size, max_width):
-    """Wrap a single long line into multiple lines that fit max_width."""
+    """
+    Wrap a single long line into multiple lines that fit max_width.
+    Each word is measured once (cached per font) and the line width is
+    accumulated, instead of re-measuring the whole growing line per word.
+    """
     words = text.split()
-    lines, cur = [], ""
+    scale = 0.001 * font_size
+    space = _units(" ", font_name)
+
+    lines, cur, cur_units = [], [], 0
     for w in words:
-        test = (cur + " " + w).strip()
-        if stringWidth(test, font_name, font_size) <= max_width:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            cur = w
+        wu = _units(w, font_name)
+        test_units = cur_units + space + wu if cur else wu
+        width = test_units * 0.001 * font_size
+        if abs(width - max_width) < 1e-6:
+            # too close to call with accumulated floats; measure exactly like before
+            width = stringWidth(" ".join(cur + [w]), font_name, font_size)
+
+        if width <= max_width:
+            cur.append(w)
+            cur_units = test_units
+            continue
+
+        if cur:
+            lines.append(" ".join(cur))
+        if wu * scale > max_width:
+            pieces = _split_long_word(w, font_name, scale, max_width)
+            lines.extend(pieces[:-1])
+            w = pieces[-1]
+            wu = _units(w, font_name)
+        cur, cur_units = [w], wu
+
     if cur:
-        lines.append(cur)
+        lines.append(" ".join(cur))
     return lines
 
-def _is_section_title(line: str) -> bool:
-    # ALL CAPS section titles like SUMMARY, EXPERIENCE, SKILLS, EDUCATION, CERTIFICATIONS
-    s = line.strip()
-    return bool(s) and s == s.upper() and len(s) <= 40 and re.match(r"^[A-Z0-9 &/,-]+$", s)
-
-def _is_bullet(line: str) -> bool:
-    return line.lstrip().startswith(('-', '•', '*'))
 def write_resume_pdf(text, out_path, title="TAILORED RESUME", template="ATS_CLASSIC"):
     ...
 
@@ -39,30 +89,34 @@ def write_resume_pdf(text, out_path, title="TAILORED RESUME", template="ATS_CLAS
     - Indented hyphen bullets with wrapping
     - Consistent line spacing and page breaks
     - Subheadings (e.g., in skills) detected and bolded if short all-caps after colon or similar
+
+    out_path can be a file path or a writable binary stream (e.g. io.BytesIO).
     """
+    tpl = get_pdf_template(template)
     c = canvas.Canvas(out_path, pagesize=LETTER)
     width, height = LETTER
 
-    left = 0.75 * inch
-    right = 0.75 * inch
-    top = 0.75 * inch
-    bottom = 0.75 * inch
+    left = tpl.margin_left
+    right = tpl.margin_right
+    top = tpl.margin_top
+    bottom = tpl.margin_bottom
 
     usable_w = width - left - right
     y = height - top
 
     # Fonts and sizes
-    BODY_FONT = "Times-Roman"
-    BOLD_FONT = "Times-Bold"
-    BODY_SIZE = 11
-    NAME_SIZE = 18
-    CONTACT_SIZE = 10
-    SECTION_SIZE = 12
-    SUBHEADING_SIZE = 11
+    BODY_FONT = tpl.body_font
+    BOLD_FONT = tpl.bold_font
+    BODY_SIZE = tpl.body_size
+    NAME_SIZE = tpl.name_size
+    CONTACT_SIZE = tpl.contact_size
+    SECTION_SIZE = tpl.section_size
+    SUBHEADING_SIZE = tpl.subheading_size
+    LINE_SPACING = tpl.line_spacing
 
     # Indents
-    BULLET_INDENT = 0.25 * inch
-    BULLET_WIDTH = stringWidth('- ', BODY_FONT, BODY_SIZE)  # Width of bullet prefix
+    BULLET_INDENT = tpl.bullet_indent
+    BULLET_WIDTH = tpl.bullet_width
 
     def new_page():
         nonlocal y
@@ -71,7 +125,7 @@ def write_resume_pdf(text, out_path, title="TAILORED RESUME", template="ATS_CLAS
 
     def draw_wrapped_lines(lines, font_name=BODY_FONT, font_size=BODY_SIZE, indent=0, extra_gap=0, is_bullet=False):
         nonlocal y
-        line_height = font_size * 1.2
+        line_height = font_size * LINE_SPACING
         for i, wline in enumerate(lines):
             if y - line_height < bottom:
                 new_page()
@@ -87,90 +141,68 @@ def write_resume_pdf(text, out_path, title="TAILORED RESUME", template="ATS_CLAS
         if extra_gap:
             y -= extra_gap
 
-    # Normalize input text
-    text = (text or "").replace("\r\n", "\n").replace("\r", "\n").strip()
-    lines_in = text.split("\n")
-
-    is_first_line = True
-    prev_was_section = False
-    in_skills = False
-
-    for raw in lines_in:
-        line = raw.rstrip()
-
-        # Skip empty lines but add spacing
-        if not line.strip():
-            y -= BODY_SIZE * 0.5
-            if y < bottom:
-                new_page()
-            continue
-
-        # Normalize bullets to '- '
-        if _is_bullet(line):
-            line = '- ' + line.lstrip('•*- ').strip()
-
-        # Name (first line, assume it's the name)
-        if is_first_line:
-            wrapped = _wrap_line(line, BOLD_FONT, NAME_SIZE, usable_w)
-            draw_wrapped_lines(wrapped, BOLD_FONT, NAME_SIZE, extra_gap=BODY_SIZE * 0.5)
-            is_first_line = False
-            continue
+    # Line classification is shared with the DOCX writer (parsed once per text)
+    doc = parse_resume(text)
 
-        # Contact info (second line, assume after name)
-        if '|' in line and '@' in line:  # Heuristic for contact with pipes
-            wrapped = _wrap_line(line, BODY_FONT, CONTACT_SIZE, usable_w)
-            draw_wrapped_lines(wrapped, BODY_FONT, CONTACT_SIZE, extra_gap=BODY_SIZE * 1.0)
-            continue
+    # Name (first line)
+    if doc.name is not None:
+        wrapped = _wrap_line(doc.name, BOLD_FONT, NAME_SIZE, usable_w)
+        draw_wrapped_lines(wrapped, BOLD_FONT, NAME_SIZE, extra_gap=BODY_SIZE * 0.5)
 
+    for section in doc.sections:
         # Section title
-        if _is_section_title(line):
-            if 'TECHNICAL SKILLS' in line.upper():
-                in_skills = True
-            else:
-                in_skills = False
+        if section.title is not None:
             y -= BODY_SIZE * 0.8  # Extra space before section
             if y < bottom:
                 new_page()
-            wrapped = _wrap_line(line.strip(), BOLD_FONT, SECTION_SIZE, usable_w)
+            wrapped = _wrap_line(section.title, BOLD_FONT, SECTION_SIZE, usable_w)
+            if tpl.colored_sections:
+                c.setFillColor(tpl.section_color)
             draw_wrapped_lines(wrapped, BOLD_FONT, SECTION_SIZE, extra_gap=BODY_SIZE * 0.3)
-            prev_was_section = True
-            continue
+            if tpl.colored_sections:
+                c.setFillColor(colors.black)
 
-        # Job headers (e.g., Company, Date, Role, Location) - bold if short and after section or job
-        if prev_was_section or (len(line.strip()) < 50 and not _is_bullet(line) and re.search(r'\d{4}', line)):
-            font = BOLD_FONT if ' - ' in line or re.match(r'^[A-Z][a-z]+ \d{4} - ', line) else BODY_FONT
-            size = SUBHEADING_SIZE if font == BOLD_FONT else BODY_SIZE
-            wrapped = _wrap_line(line, font, size, usable_w)
-            draw_wrapped_lines(wrapped, font, size, extra_gap=BODY_SIZE * 0.2 if font == BOLD_FONT else 0)
-            prev_was_section = False
-            continue
+        for block in section.blocks:
+            line = block.text
 
-        # Skills subheadings (e.g., "• Category: list" treated as bold category)
-        if in_skills and ':' in line and _is_bullet(line):
-            # Split into category and list
-            parts = line.split(':', 1)
-            if len(parts) == 2:
-                category = parts[0].lstrip('- ').strip() + ':'
-                list_text = parts[1].strip()
-                # Draw bold category
-                wrapped_cat = _wrap_line(category, BOLD_FONT, SUBHEADING_SIZE, usable_w - BULLET_INDENT)
+            # Empty lines add spacing
+            if block.kind == BLANK:
+                y -= BODY_SIZE * 0.5
+                if y < bottom:
+                    new_page()
+                continue
+
+            # Contact info
+            if block.kind == CONTACT:
+                wrapped = _wrap_line(line, BODY_FONT, CONTACT_SIZE, usable_w)
+                draw_wrapped_lines(wrapped, BODY_FONT, CONTACT_SIZE, extra_gap=BODY_SIZE * 1.0)
+                continue
+
+            # Job headers (e.g., Company, Date, Role, Location)
+            if block.kind == HEADER:
+                font = BOLD_FONT if block.bold else BODY_FONT
+                size = SUBHEADING_SIZE if block.bold else BODY_SIZE
+                wrapped = _wrap_line(line, font, size, usable_w)
+                draw_wrapped_lines(wrapped, font, size, extra_gap=BODY_SIZE * 0.2 if block.bold else 0)
+                continue
+
+            # Skills subheadings: bold category, then the list wrapped underneath
+            if block.kind == SKILL:
+                wrapped_cat = _wrap_line(block.category, BOLD_FONT, SUBHEADING_SIZE, usable_w - BULLET_INDENT)
                 draw_wrapped_lines(wrapped_cat, BOLD_FONT, SUBHEADING_SIZE, indent=BULLET_INDENT, extra_gap=0)
-                # Draw list as normal, wrapped
-                wrapped_list = _wrap_line(list_text, BODY_FONT, BODY_SIZE, usable_w - BULLET_INDENT * 2)
+                wrapped_list = _wrap_line(block.items, BODY_FONT, BODY_SIZE, usable_w - BULLET_INDENT * 2)
                 draw_wrapped_lines(wrapped_list, BODY_FONT, BODY_SIZE, indent=BULLET_INDENT * 2, extra_gap=BODY_SIZE * 0.3)
                 continue
 
-        # Regular bullets with indent
-        if _is_bullet(line):
-            max_w = usable_w - BULLET_INDENT - BULLET_WIDTH
-            wrapped = _wrap_line(line, BODY_FONT, BODY_SIZE, max_w)
-            draw_wrapped_lines(wrapped, BODY_FONT, BODY_SIZE, indent=BULLET_INDENT, is_bullet=True, extra_gap=BODY_SIZE * 0.1)
-            prev_was_section = False
-            continue
+            # Regular bullets with indent
+            if block.kind == BULLET:
+                max_w = usable_w - BULLET_INDENT - BULLET_WIDTH
+                wrapped = _wrap_line(line, BODY_FONT, BODY_SIZE, max_w)
+                draw_wrapped_lines(wrapped, BODY_FONT, BODY_SIZE, indent=BULLET_INDENT, is_bullet=True, extra_gap=BODY_SIZE * 0.1)
+                continue
 
-        # Default: paragraphs or other lines, wrapped
-        wrapped = _wrap_line(line, BODY_FONT, BODY_SIZE, usable_w)
-        draw_wrapped_lines(wrapped, BODY_FONT, BODY_SIZE, extra_gap=BODY_SIZE * 0.2)
-        prev_was_section = False
+            # Default: paragraphs or other lines, wrapped
+            wrapped = _wrap_line(line, BODY_FONT, BODY_SIZE, usable_w)
+            draw_wrapped_lines(wrapped, BODY_FONT, BODY_SIZE, extra_gap=BODY_SIZE * 0.2)
 
-    c.save()
\ No newline at end of file
+    c.save()
@@ -0,0 +1,280 @@
+# utils/prompt.py
+import hashlib
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Tuple
+
+from utils.text_analysis import alignment_tokens
+
+RESUME_PROMPT = """
+You are a resume enhancer.
+
+STRICT RULES:
+- Do NOT add fake experience
+- Do NOT add new companies, tools, skills, certifications
+- Do NOT change dates, titles, locations
+- Output must be PLAIN TEXT ONLY (no markdown, no **, no ##, no tables)
+
+FORMATTING RULES:
+- Use ALL CAPS for section titles (SUMMARY, EXPERIENCE, EDUCATION, SKILLS, CERTIFICATIONS)
+- Use hyphen (-) for bullets
+- One blank line between sections
+
+RESUME:
+{resume_text}
+
+JOB DESCRIPTION:
+{jd_text}
+
+TASK:
+Rewrite the resume to better align to the job description while staying truthful.
+"""
+
+# One section at a time (section mode): same rules, only the JD lines that share terms with the section
+SECTION_PROMPT = """
+You are a resume enhancer. You are rewriting ONE section of a resume.
+
+STRICT RULES:
+- Do NOT add fake experience
+- Do NOT add new companies, tools, skills, certifications
+- Do NOT change dates, titles, locations
+- Output must be PLAIN TEXT ONLY (no markdown, no **, no ##, no tables)
+
+FORMATTING RULES:
+- Start with the section title in ALL CAPS: {section_title}
+- Use hyphen (-) for bullets
+- Output this section only: no name, contact details or other sections
+
+RESUME SECTION:
+{section_text}
+
+RELEVANT JOB DESCRIPTION LINES:
+{jd_text}
+
+TASK:
+Rewrite this section to better align to the job description while staying truthful.
+"""
+
+# Compaction: whitespace/PDF noise, JD boilerplate, repeated lines, JD token budget.
+PROMPT_COMPACT = os.getenv("PROMPT_COMPACT", "1") == "1"
+PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", "1200"))
+# Bump when the compaction rules change (they change what the model sees).
+COMPACTION_VERSION = "2"
+
+# Editing the template or the compaction settings changes the version
+# automatically, which invalidates cached generations. Set PROMPT_VERSION in
+# the env to force a bump by hand.
+_version_source = f"{RESUME_PROMPT}\x00{SECTION_PROMPT}\x00{PROMPT_COMPACT}:{COMPACTION_VERSION}:{PROMPT_JD_TOKEN_BUDGET}"
+PROMPT_VERSION = os.getenv("PROMPT_VERSION") or hashlib.sha256(_version_source.encode("utf-8")).hexdigest()[:12]
+
+_CHAR_FIXES = str.maketrans({"\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\u00ad": None, "\u200b": None, "\ufeff": None, "\f": "\n"})
+_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200a\u3000]+")
+_PAGE_NOISE_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.I)
+
+# a company name after "About"/"Life at"/"Why join": one to four words
+_NAME = r"[\w&.,'-]+( [\w&.,'-]+){0,3}"
+
+# JD sections that never help the rewrite (only checked on heading-shaped lines, see is_heading)
+_BOILERPLATE_HEADING_RE = re.compile(
+    r"^(about (us|our company|the company|(?!(the )?(role|job|position|opportunity|team|you)\b)" + _NAME + r")"
+    r"|who we are|our (mission|story|values|culture)|why (join|work (at|with|for)) (us|" + _NAME + r")|why us"
+    r"|life at " + _NAME +
+    r"|(benefits|perks)( (and|&) (benefits|perks))?|what we offer|compensation( (and|&) benefits)?"
+    r"|salary( range)?|pay (range|transparency)|total rewards"
+    r"|equal (employment )?opportunity( employer)?|eeo( statement)?"
+    r"|diversity(,? (and|&) inclusion| (equity|inclusion)(,? (and|&) (inclusion|belonging))?)?( statement)?"
+    r"|(reasonable )?accommodations?|privacy( notice| policy)?|disclaimer|how to apply|application process)\s*:?$",
+    re.I,
+)
+# JD sections the budget favours
+_PRIORITY_HEADING_RE = re.compile(
+    r"(responsib|requirement|qualifica|what you('ll| will)|you will|you have|must|skills|experience|duties|the role|your role)",
+    re.I,
+)
+# other headings JDs commonly use (ends a boilerplate section)
+_SECTION_HEADING_RE = re.compile(
+    r"^(about the (role|job|position|team|opportunity)|about you|the (role|team|opportunity)|overview|summary"
+    r"|job (description|summary)|(key )?responsibilities|requirements|((minimum|basic|preferred) )?qualifications"
+    r"|nice to haves?|bonus points|preferred|what you('ll| will) (do|bring|need|work on)|what we('re| are) looking for"
+    r"|who you are|you (will|have)|(required )?skills|tech(nology)? stack|duties)\s*:?$",
+    re.I,
+)
+# boilerplate sentences, wherever they appear: EEO statements, and benefits or
+# screening terms only inside an offer/eligibility sentence, so requirements
+# that mention them ("dental practice software", "background check APIs") stay
+_BOILERPLATE_LINE_RE = re.compile(
+    r"(equal (employment )?opportunity|without regard to (race|colou?r|religion|sex|age|national origin)"
+    r"|race, colou?r|sexual orientation|protected veteran|e-verify"
+    r"|(request|need) (a |an )?(reasonable )?accommodation|reasonable accommodations? (will|may|are|is|can)"
+    r"|we are committed to (building|creating|fostering) a diverse|^(about (us|our company)|who we are)\s*:"
+    r"|\b(we offer|offering|eligible (for|to)|you('ll| will) (get|receive|enjoy)|benefits? (include|package)"
+    r"|employees (receive|get|enjoy)|must (pass|complete|successfully)|subject to|contingent (up)?on)\b"
+    r".*\b(dental|vision|401\(?k\)?|paid time off|pto|parental leave|background (check|screening)|drug (test|screen))"
+    r"|\b(medical|health),? dental,? (and )?vision\b"
+    r"|\b401\(?k\)? (plan )?(with )?(employer |company )?match)",
+    re.I,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (~4 characters per token for English); no tokenizer needed."""
+    return (len(text) + 3) // 4
+
+
+def normalize_lines(text: str) -> List[str]:
+    """Fix extraction noise (ligatures, soft hyphens, page numbers), collapse spaces and blank runs."""
+    lines = []
+    for raw in (text or "").translate(_CHAR_FIXES).replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _SPACE_RE.sub(" ", raw).strip()
+        if _PAGE_NOISE_RE.match(line):
+            continue
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def dedupe_lines(lines: List[str], min_chars: int = 0) -> Tuple[List[str], int]:
+    """Drop repeats of lines (case/spacing-insensitive) at least min_chars long; returns (lines, dropped)."""
+    seen, out, dropped = set(), [], 0
+    for line in lines:
+        key = line.lower()
+        if line and len(line) >= min_chars:
+            if key in seen:
+                dropped += 1
+                continue
+            seen.add(key)
+        out.append(line)
+    return out, dropped
+
+
+def _heading_shaped(line: str) -> bool:
+    """Short, no digits, and either ends in a colon, is ALL CAPS or is Title Case (short words aside)."""
+    if not line or len(line) > 60 or line.startswith(("-", "*", "•")) or any(c.isdigit() for c in line):
+        return False
+    if line.endswith(":") or line.isupper():
+        return True
+    words = line.split()
+    return words[0][:1].isupper() and all(w[:1].isupper() for w in words[1:] if len(w) > 3)
+
+
+def is_heading(line: str) -> bool:
+    if not _heading_shaped(line):
+        return False
+    return (
+        line.endswith(":")
+        or (line.isupper() and len(line) > 3)
+        or bool(_BOILERPLATE_HEADING_RE.match(line) or _SECTION_HEADING_RE.match(line))
+    )
+
+
+def strip_boilerplate(lines: List[str]) -> Tuple[List[str], int]:
+    """Remove about-us/benefits/EEO sections (heading through the next heading) and stray boilerplate lines."""
+    out, dropped, skipping = [], 0, False
+    for line in lines:
+        if is_heading(line):
+            skipping = bool(_BOILERPLATE_HEADING_RE.match(line))
+        if skipping or (line and _BOILERPLATE_LINE_RE.search(line)):
+            dropped += bool(line)
+            continue
+        out.append(line)
+    return out, dropped
+
+
+def fit_budget(lines: List[str], token_budget: int) -> Tuple[List[str], int]:
+    """
+    Keep the most informative JD lines within token_budget. A line's value is
+    the JD-wide frequency of the alignment terms it carries (each term counted
+    once), doubled under requirement/responsibility headings; lines are taken
+    by value per token and returned in their original order, with the headings
+    of kept lines. Returns (lines, dropped).
+
+    Lines are tokenized directly, not through analyze(): they are one-off
+    texts and would only evict resumes and JDs from the shared cache.
+    """
+    if estimate_tokens("\n".join(lines)) <= token_budget:
+        return lines, 0
+
+    line_terms = [alignment_tokens(line) for line in lines]
+    counts = Counter(chain.from_iterable(line_terms))
+    heading_of, current = {}, None
+    candidates = []
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        if is_heading(line):
+            current = i
+            continue
+        heading_of[i] = current
+        weight = 2 if current is not None and _PRIORITY_HEADING_RE.search(lines[current]) else 1
+        value = weight * sum(counts[t] for t in set(line_terms[i]))
+        cost = estimate_tokens(line) + 1
+        candidates.append((value / cost, -i, i, cost))
+
+    keep, used = set(), 0
+    for _, _, i, cost in sorted(candidates, reverse=True):
+        h = heading_of[i]
+        extra = estimate_tokens(lines[h]) + 1 if h is not None and h not in keep else 0
+        if used + cost + extra > token_budget:
+            continue
+        keep.add(i)
+        if extra:
+            keep.add(h)
+        used += cost + extra
+
+    out = [line for i, line in enumerate(lines) if i in keep]
+    return out, sum(1 for line in lines if line) - len(out)
+
+
+def compact_resume(text: str) -> Tuple[str, Dict[str, int]]:
+    """Normalized resume; only long repeated lines (page headers/footers) go, never content."""
+    compacted, dupes = _compact_resume(text)
+    return compacted, {"duplicates": dupes}
+
+
+@lru_cache(maxsize=64)
+def _compact_resume(text: str) -> Tuple[str, int]:
+    # memoized: a batch builds a prompt from the same resume (or section) for every JD
+    lines = normalize_lines(text)
+    lines, dupes = dedupe_lines(lines, min_chars=20)
+    return "\n".join(lines), dupes
+
+
+def compact_jd(text: str, token_budget: int = PROMPT_JD_TOKEN_BUDGET) -> Tuple[str, Dict[str, int]]:
+    lines = normalize_lines(text)
+    lines, boilerplate = strip_boilerplate(lines)
+    lines, dupes = dedupe_lines(lines)
+    lines, over_budget = fit_budget(lines, token_budget)
+    return "\n".join(lines), {"boilerplate": boilerplate, "duplicates": dupes, "over_budget": over_budget}
+
+
+def prepare_prompt(resume_text: str, jd_text: str) -> Tuple[str, Dict[str, int]]:
+    """Prompt for one resume/JD pair plus a size report (characters and estimated tokens, before/after)."""
+    raw_resume, raw_jd = resume_text, jd_text
+    report = {
+        "resume_chars_before": len(resume_text or ""),
+        "jd_chars_before": len(jd_text or ""),
+    }
+    if PROMPT_COMPACT:
+        resume_text, resume_dropped = compact_resume(resume_text)
+        jd_text, jd_dropped = compact_jd(jd_text)
+        report.update({f"resume_{k}_lines_dropped": v for k, v in resume_dropped.items()})
+        report.update({f"jd_{k}_lines_dropped": v for k, v in jd_dropped.items()})
+    report["resume_chars_after"] = len(resume_text or "")
+    report["jd_chars_after"] = len(jd_text or "")
+    report["tokens_before"] = estimate_tokens(RESUME_PROMPT.format(resume_text=raw_resume or "", jd_text=raw_jd or ""))
+    prompt = RESUME_PROMPT.format(resume_text=resume_text, jd_text=jd_text)
+    report["tokens_after"] = estimate_tokens(prompt)
+    return prompt, report
+
+
+def build_section_prompt(section_title: str, section_text: str, jd_text: str) -> str:
+    """Prompt for one resume section; jd_text is already the section's relevant (compacted) JD lines."""
+    if PROMPT_COMPACT:
+        section_text, _ = compact_resume(section_text)
+    return SECTION_PROMPT.format(section_title=section_title, section_text=section_text, jd_text=jd_text)
@@ -0,0 +1,215 @@
+# utils/renderer.py
+import hashlib
+import importlib
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Tuple
+
+from cachetools import TTLCache
+
+# Bump when a writer's output changes, so browsers holding an old ETag re-download.
+RENDERER_VERSION = "3"
+
+# Writers are named, not imported: reportlab / python-docx load on the first render.
+FORMATS = {
+    "pdf": ("application/pdf", "utils.pdf_writer:write_resume_pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "utils.docx_writer:write_resume_docx"),
+}
+
+_cache = TTLCache(maxsize=64 * 1024 * 1024, ttl=600, getsizeof=len)
+_inflight = {}  # render key -> Future, so concurrent requests share one render
+_lock = threading.Lock()
+
+_executor = None
+_executor_pid = None
+_prerender_workers = 2
+
+# Bundle renders are CPU-bound (reportlab/python-docx hold the GIL), so they go to processes.
+_procs = None
+_procs_pid = None
+_bundle_workers = 4
+
+
+def configure_cache(max_bytes: int, ttl: int = 600, prerender_workers: int = 2, bundle_workers: int = 4):
+    """Size the render cache (bytes of rendered files kept in this process) and the pre-render/bundle pools."""
+    global _cache, _prerender_workers, _bundle_workers
+    with _lock:
+        _cache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=len)
+        _prerender_workers = max(1, prerender_workers)
+        _bundle_workers = max(1, bundle_workers)
+
+
+def render_key(text: str, template: str, fmt: str) -> str:
+    """Cache key and ETag for one rendering of `text`."""
+    h = hashlib.sha256(f"{RENDERER_VERSION}\x00{template}\x00{fmt}\x00".encode("utf-8"))
+    h.update((text or "").encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def get_writer(fmt: str):
+    module, func = FORMATS[fmt][1].split(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def render_bytes(text: str, template: str, fmt: str) -> bytes:
+    """Render straight into memory; no temp files."""
+    writer = get_writer(fmt)
+    buf = io.BytesIO()
+    writer(text, buf, title="TAILORED RESUME", template=template)
+    return buf.getvalue()
+
+
+def render_resume(text: str, template: str, fmt: str) -> Tuple[bytes, str]:
+    """
+    Return (file bytes, etag), reusing a cached rendering when there is one.
+    If the same file is already being rendered (e.g. pre-rendered in the
+    background), wait for that render instead of starting a duplicate.
+    """
+    key = render_key(text, template, fmt)
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            return data, key
+        pending = _inflight.get(key)
+        if pending is None:
+            pending = _inflight[key] = Future()
+            owner = True
+        else:
+            owner = False
+
+    if not owner:
+        return pending.result(), key
+
+    try:
+        data = render_bytes(text, template, fmt)
+        with _lock:
+            _cache[key] = data
+        pending.set_result(data)
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+    return data, key
+
+
+def _pool() -> ThreadPoolExecutor:
+    # created lazily and per process, so it survives gunicorn's fork
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=_prerender_workers, thread_name_prefix="prerender")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def prerender(text: str, template: str, formats: Iterable[str] = ("pdf", "docx")):
+    """Render `formats` in the background so the download routes only return bytes."""
+    pool = _pool()
+    for fmt in formats:
+        pool.submit(render_resume, text, template, fmt)
+
+
+def mimetype(fmt: str) -> str:
+    return FORMATS[fmt][0]
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    # lazy + per process (gunicorn forks workers); forkserver avoids forking a threaded worker
+    global _procs, _procs_pid
+    with _lock:
+        if _procs is None or _procs_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+            _procs = ProcessPoolExecutor(max_workers=_bundle_workers, mp_context=ctx)
+            _procs_pid = os.getpid()
+        return _procs
+
+
+def _reset_process_pool():
+    global _procs
+    with _lock:
+        if _procs is not None:
+            _procs.shutdown(wait=False, cancel_futures=True)
+        _procs = None
+
+
+def render_many(text: str, combos: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], bytes]:
+    """
+    Render several (template, format) combinations of `text` at once.
+    Cached files are reused and renders already in flight are awaited; the
+    rest run concurrently in a process pool (inline when only one is missing).
+    """
+    combos = list(dict.fromkeys(combos))
+    keys = {combo: render_key(text, *combo) for combo in combos}
+    out, waiting, owned = {}, {}, []
+    with _lock:
+        for combo, key in keys.items():
+            data = _cache.get(key)
+            if data is not None:
+                out[combo] = data
+            elif key in _inflight:
+                waiting[combo] = _inflight[key]
+            else:
+                _inflight[key] = Future()
+                owned.append(combo)
+
+    def finish(combo, data=None, exc=None):
+        key = keys[combo]
+        with _lock:
+            pending = _inflight.pop(key)
+            if exc is None:
+                _cache[key] = data
+        if exc is None:
+            pending.set_result(data)
+        else:
+            pending.set_exception(exc)
+
+    remaining: List[Tuple[str, str]] = list(owned)
+    try:
+        if len(owned) > 1 and _bundle_workers > 1:
+            try:
+                pool = _process_pool()
+                futures = [(combo, pool.submit(render_bytes, text, *combo)) for combo in owned]
+                for combo, f in futures:
+                    out[combo] = f.result()
+                    finish(combo, out[combo])
+                    remaining.remove(combo)
+            except BrokenProcessPool:
+                # a pool worker died; rebuild it next time and finish inline
+                _reset_process_pool()
+        for combo in list(remaining):
+            out[combo] = render_bytes(text, *combo)
+            finish(combo, out[combo])
+            remaining.remove(combo)
+    except BaseException as e:
+        for combo in remaining:
+            finish(combo, exc=e)
+        raise
+
+    for combo, pending in waiting.items():
+        out[combo] = pending.result()
+    return out
+
+
+def bundle_key(text: str, combos: Iterable[Tuple[str, str]]) -> str:
+    """ETag for a bundle: the render keys of its members, in order."""
+    h = hashlib.sha256()
+    for template, fmt in combos:
+        h.update(render_key(text, template, fmt).encode("ascii"))
+    return h.hexdigest()[:32]
+
+
+def build_bundle(files: Iterable[Tuple[str, bytes]]) -> bytes:
+    """ZIP (name, bytes) pairs in memory. PDF and DOCX are already compressed, so members are stored."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+    return buf.getvalue()
@@ -0,0 +1,109 @@
+# utils/result_store.py
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+
+
+def new_result_id() -> str:
+    """Opaque, unguessable id; the session cookie carries only this."""
+    return secrets.token_urlsafe(16)
+
+
+def _encode(value: Dict) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class MemoryResultStore:
+    """
+    Per-process store (TTL + size bounded). Fine for `flask run` or a single
+    worker; with several gunicorn workers use SQLiteResultStore instead.
+    """
+
+    def __init__(self, ttl: int = 86400, max_items: int = 10000, max_bytes: int = 200 * 1024 * 1024):
+        self.max_items = max_items
+        self._items = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=len)
+        self._lock = threading.Lock()
+
+    def put(self, value: Dict, result_id: Optional[str] = None) -> str:
+        result_id = result_id or new_result_id()
+        with self._lock:
+            self._items[result_id] = _encode(value)
+            while len(self._items) > self.max_items:
+                self._items.popitem()
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        with self._lock:
+            raw = self._items.get(result_id)
+        return json.loads(raw) if raw else None
+
+
+class SQLiteResultStore:
+    """
+    On-disk store shared by every gunicorn worker on the box.
+    Rows expire after `ttl`; past max_items/max_bytes the oldest rows go first.
+    """
+
+    def __init__(self, path: str, ttl: int = 86400, max_items: int = 10000, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " id TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def put(self, value: Dict, result_id: Optional[str] = None) -> str:
+        result_id = result_id or new_result_id()
+        raw = _encode(value)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (id, value, size, created_at) VALUES (?, ?, ?, ?)",
+                (result_id, raw, len(raw), time.time()),
+            )
+            self._evict(conn)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM results WHERE id = ? AND created_at > ?",
+                (result_id, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM results WHERE created_at <= ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM results WHERE id IN ("
+            " SELECT id FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_items,),
+        )
+        conn.execute(
+            "DELETE FROM results WHERE id IN ("
+            " SELECT id FROM (SELECT id, SUM(size) OVER (ORDER BY created_at DESC) AS running FROM results)"
+            " WHERE running > ?)",
+            (self.max_bytes,),
+        )
+
+
+def make_result_store(backend: str, path: str, ttl: int, max_items: int, max_bytes: int):
+    if backend == "memory":
+        return MemoryResultStore(ttl=ttl, max_items=max_items, max_bytes=max_bytes)
+    if backend == "sqlite":
+        return SQLiteResultStore(path, ttl=ttl, max_items=max_items, max_bytes=max_bytes)
+    raise ValueError(f"Unknown result store backend: {backend!r} (use 'sqlite' or 'memory').")
@@ -0,0 +1,142 @@
+# utils/resume_model.py
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from cachetools import LRUCache
+
+# Block kinds
+BLANK = "blank"
+CONTACT = "contact"
+HEADER = "header"        # job/role subheading (company, dates, title...)
+SKILL = "skill"          # "- Category: a, b, c" inside TECHNICAL SKILLS
+BULLET = "bullet"
+PARAGRAPH = "paragraph"
+
+SECTION_TITLE_RE = re.compile(r"^[A-Z0-9 &/,-]+$")
+YEAR_RE = re.compile(r"\d{4}")
+DATED_HEADER_RE = re.compile(r"^[A-Z][a-z]+ \d{4} - ")
+
+
+@dataclass(frozen=True)
+class Block:
+    kind: str
+    text: str = ""       # the line as the writers draw it (bullets normalized to "- ...")
+    bold: bool = False   # HEADER only
+    category: str = ""   # SKILL only, e.g. "Languages:"
+    items: str = ""      # SKILL only, e.g. "Python, SQL"
+
+    @property
+    def content(self) -> str:
+        """Bullet text without its "- " marker."""
+        return self.text.lstrip("- ").strip()
+
+
+@dataclass(frozen=True)
+class Section:
+    title: Optional[str]  # None for the lines between the name and the first section title
+    blocks: Tuple[Block, ...]
+    is_skills: bool = False
+
+
+@dataclass(frozen=True)
+class ResumeDocument:
+    name: Optional[str]
+    contact: Optional[str]  # first contact line, if any (also kept as a CONTACT block)
+    sections: Tuple[Section, ...]
+
+
+def is_section_title(line: str) -> bool:
+    # ALL CAPS section titles like SUMMARY, EXPERIENCE, SKILLS, EDUCATION, CERTIFICATIONS
+    s = line.strip()
+    return bool(s) and s == s.upper() and len(s) <= 40 and bool(SECTION_TITLE_RE.match(s))
+
+
+def is_bullet(line: str) -> bool:
+    return line.lstrip().startswith(('-', '•', '*'))
+
+
+def _parse(text: str) -> ResumeDocument:
+    # Normalize input text
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n").strip()
+
+    name = None
+    contact = None
+    sections = []
+    title, blocks, in_skills = None, [], False
+    prev_was_section = False
+
+    for raw in text.split("\n"):
+        line = raw.rstrip()
+
+        # Empty lines only add spacing
+        if not line.strip():
+            blocks.append(Block(BLANK))
+            continue
+
+        # Normalize bullets to '- '
+        bullet = is_bullet(line)
+        if bullet:
+            line = '- ' + line.lstrip('•*- ').strip()
+
+        # Name (first line, assume it's the name)
+        if name is None:
+            name = line
+            continue
+
+        # Contact info (pipes + email)
+        if '|' in line and '@' in line:
+            contact = contact or line.strip()
+            blocks.append(Block(CONTACT, line))
+            continue
+
+        # Section title
+        if is_section_title(line):
+            if title is not None or blocks:
+                sections.append(Section(title, tuple(blocks), in_skills))
+            title, blocks = line.strip(), []
+            in_skills = 'TECHNICAL SKILLS' in line.upper()
+            prev_was_section = True
+            continue
+
+        # Job headers (e.g., Company, Date, Role, Location) - right after a section title, or short with a year
+        if prev_was_section or (len(line.strip()) < 50 and not bullet and YEAR_RE.search(line)):
+            bold = ' - ' in line or bool(DATED_HEADER_RE.match(line))
+            blocks.append(Block(HEADER, line, bold=bold))
+            prev_was_section = False
+            continue
+
+        # Skills subheadings ("- Category: list")
+        if in_skills and ':' in line and bullet:
+            category, items = line.split(':', 1)
+            blocks.append(Block(SKILL, line, category=category.lstrip('- ').strip() + ':', items=items.strip()))
+            continue
+
+        blocks.append(Block(BULLET if bullet else PARAGRAPH, line))
+        prev_was_section = False
+
+    if title is not None or blocks:
+        sections.append(Section(title, tuple(blocks), in_skills))
+    return ResumeDocument(name=name, contact=contact, sections=tuple(sections))
+
+
+_cache = LRUCache(maxsize=128)
+_lock = threading.Lock()
+
+
+def parse_resume(text: str) -> ResumeDocument:
+    """
+    Classify the tailored resume's lines once (name, contact, sections with
+    headers, bullets and skill categories). Memoized by content hash, so
+    exporting both PDF and DOCX parses the text a single time.
+    """
+    key = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    with _lock:
+        doc = _cache.get(key)
+    if doc is None:
+        doc = _parse(text)
+        with _lock:
+            _cache[key] = doc
+    return doc
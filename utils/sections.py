@@ -0,0 +1,199 @@
+# utils/sections.py
+import contextvars
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from utils.llm_cache import TailorCache
+from utils.prompt import (
+    PROMPT_JD_TOKEN_BUDGET,
+    build_section_prompt,
+    compact_jd,
+    fit_budget,
+    is_heading,
+)
+from utils.text_analysis import alignment_tokens
+
+# Headings resumes actually use, in any case, optionally qualified ("Professional
+# Experience", "Technical Skills") and/or ending in a colon. A plain ALL CAPS test
+# would also split on company names and the candidate's name.
+_RESUME_HEADING_RE = re.compile(
+    r"^((professional|work|relevant|technical|key|core|selected|academic|additional|other|career)\s+)*"
+    r"(summary|profile|objective|experience|employment( history)?|work history|education|skills|competencies"
+    r"|projects|certifications?|licen[cs]es|awards|honou?rs|achievements|publications|volunteer(ing)?"
+    r"|leadership|activities|interests|languages|references|training|courses|coursework)"
+    r"(\s*(and|&|/)\s*[a-z]+)?( experience)?\s*:?$",
+    re.I,
+)
+
+
+@dataclass(frozen=True)
+class ResumeSection:
+    title: Optional[str]  # None for the name/contact lines above the first heading
+    text: str             # the section as extracted, heading line included
+
+    @property
+    def kind(self) -> str:
+        """Bounded label for metrics: the heading's core word ("experience", "skills"...), "header" above the first one."""
+        if self.title is None:
+            return "header"
+        match = _RESUME_HEADING_RE.match(self.title)
+        return match.group(3).lower() if match else "other"
+
+
+def is_resume_heading(line: str) -> bool:
+    s = line.strip()
+    return 0 < len(s) <= 50 and bool(_RESUME_HEADING_RE.match(s))
+
+
+def split_sections(text: str) -> List[ResumeSection]:
+    """Cut extracted resume text at its section headings; blank-only sections are dropped."""
+    sections, title, lines = [], None, []
+
+    def close():
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append(ResumeSection(title=title, text=body))
+
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        if is_resume_heading(line):
+            close()
+            title, lines = line.strip().rstrip(":").strip().upper(), []
+        lines.append(line.rstrip())
+    close()
+    return sections
+
+
+def has_sections(text: str) -> bool:
+    """True when the resume has at least two headed sections, so splitting it is worthwhile."""
+    return sum(1 for s in split_sections(text) if s.title) >= 2
+
+
+def relevant_jd_lines(section_text: str, jd_lines: List[str], token_budget: int) -> List[str]:
+    """
+    JD lines that share at least one alignment term with the section, under
+    the headings they appear in, trimmed to token_budget. This is all the
+    section prompt sees of the JD, so it is also the JD half of the cache key.
+    Tokenized directly: section texts and JD lines are not worth a slot in
+    the shared analysis cache.
+    """
+    terms = set(alignment_tokens(section_text))
+    keep, heading = [], None
+    for line in jd_lines:
+        if is_heading(line):
+            heading = line
+            continue
+        if line and not terms.isdisjoint(alignment_tokens(line)):
+            if heading is not None:
+                keep.append(heading)
+                heading = None
+            keep.append(line)
+    return fit_budget(keep, token_budget)[0]
+
+
+class SectionTailor:
+    """
+    Section-by-section tailoring for incremental re-runs. The resume is split
+    at its headings and each section is rewritten on its own, against only the
+    JD lines relevant to it; generations are cached by (section text, relevant
+    JD lines). When the user edits one section, or the JD changes in a way that
+    only touches some sections, a resubmission regenerates just those and
+    stitches the rest from the cache.
+
+    With max_workers > 1 the sections that need a call are generated
+    concurrently on a per-process thread pool (max_workers is the cap for the
+    whole process, not per request), so wall-clock time follows the longest
+    section rather than the whole resume. Results come back in resume order.
+
+    The name/contact block and sections that share no terms with the JD are
+    kept verbatim (there is nothing to align them to).
+
+    on_section(section, outcome, seconds) is told "hit", "miss" or "kept" per
+    section; it runs in the caller's context (contextvars are carried over to
+    the pool threads).
+    """
+
+    def __init__(
+        self,
+        cache: TailorCache,
+        generate: Callable[[str], str],
+        jd_token_budget: int = PROMPT_JD_TOKEN_BUDGET // 2,
+        max_workers: int = 1,
+        on_section: Optional[Callable[[ResumeSection, str, float], None]] = None,
+    ):
+        self.cache = cache
+        self.generate = generate
+        self.jd_token_budget = jd_token_budget
+        self.max_workers = max_workers
+        self._on_section = on_section
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # created lazily and per process, so it survives gunicorn's fork
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="section")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _report(self, section: ResumeSection, outcome: str, seconds: float):
+        if self._on_section is not None:
+            self._on_section(section, outcome, seconds)
+
+    def plan(self, resume_text: str, jd_text: str) -> List[Tuple[ResumeSection, Optional[str], Optional[str]]]:
+        """(section, cache key, prompt) per section; key and prompt are None for sections kept verbatim."""
+        jd_lines = compact_jd(jd_text)[0].split("\n")
+        planned = []
+        for section in split_sections(resume_text):
+            focus = relevant_jd_lines(section.text, jd_lines, self.jd_token_budget) if section.title else []
+            if not focus:
+                planned.append((section, None, None))
+                continue
+            jd_focus = "\n".join(focus)
+            key = self.cache.key("section", section.text, jd_focus)
+            planned.append((section, key, build_section_prompt(section.title, section.text, jd_focus)))
+        return planned
+
+    def _section_text(self, section: ResumeSection, key: Optional[str], prompt: Optional[str]) -> str:
+        start = time.perf_counter()
+        if key is None:
+            self._report(section, "kept", 0.0)
+            return section.text
+        raw = self.cache.get(key)
+        if raw is not None:
+            self._report(section, "hit", time.perf_counter() - start)
+            return raw
+        raw = self.generate(prompt).strip()
+        self.cache.set(key, raw)
+        self._report(section, "miss", time.perf_counter() - start)
+        return raw
+
+    def iter_sections(self, resume_text: str, jd_text: str) -> Iterator[str]:
+        """Raw text of each section in resume order, with the blank line that separates sections."""
+        planned = self.plan(resume_text, jd_text)
+        futures = {}
+        if self.max_workers > 1 and sum(1 for _, key, _ in planned if key is not None) > 1:
+            pool = self._pool()
+            futures = {
+                i: pool.submit(contextvars.copy_context().run, self._section_text, *job)
+                for i, job in enumerate(planned)
+                if job[1] is not None
+            }
+        try:
+            for i, job in enumerate(planned):
+                text = futures[i].result() if i in futures else self._section_text(*job)
+                yield ("\n\n" if i else "") + text
+        finally:
+            # a dropped stream or a failed section: don't spend calls on sections nobody will read
+            for future in futures.values():
+                future.cancel()
+
+    def tailor(self, resume_text: str, jd_text: str) -> str:
+        """Stitched raw text (before clean_output) for the whole resume."""
+        return "".join(self.iter_sections(resume_text, jd_text))
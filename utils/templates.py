@@ -1,31 +1,192 @@
 # utils/templates.py
-from reportlab.lib import colors
+import copy
+import threading
+from dataclasses import dataclass
+
+DEFAULT_TEMPLATE = "ATS_CLASSIC"
 
 PDF_TEMPLATES = {
     "ATS_CLASSIC": {
-        "font": "Helvetica",
-        "header_font": "Helvetica-Bold",
+        "font": "Times-Roman",
+        "header_font": "Times-Bold",
         "name_size": 18,
+        "contact_size": 10,
         "section_size": 12,
-        "body_size": 10.5,
-        "line_gap": 14,
+        "subheading_size": 11,
+        "body_size": 11,
+        "line_spacing": 1.2,
         "margin_left": 54,
         "margin_right": 54,
         "margin_top": 54,
         "margin_bottom": 54,
-        "section_color": colors.black,
+        "section_color": "#000000",
     },
     "ATS_BLUE": {
-        "font": "Helvetica",
-        "header_font": "Helvetica-Bold",
+        "font": "Times-Roman",
+        "header_font": "Times-Bold",
         "name_size": 18,
+        "contact_size": 10,
         "section_size": 12,
-        "body_size": 10.5,
-        "line_gap": 14,
+        "subheading_size": 11,
+        "body_size": 11,
+        "line_spacing": 1.2,
         "margin_left": 54,
         "margin_right": 54,
         "margin_top": 54,
         "margin_bottom": 54,
-        "section_color": colors.HexColor("#0A66C2"),  # LinkedIn blue
+        "section_color": "#0A66C2",  # LinkedIn blue
     },
-}
\ No newline at end of file
+}
+
+DOCX_TEMPLATES = {
+    "ATS_CLASSIC": {
+        "font": "Calibri",
+        "body_size": 11,
+        "name_size": 18,
+        "contact_size": 10,
+        "section_size": 12,
+        "margin_inches": 0.75,
+        "section_color": None,
+    },
+    "ATS_BLUE": {
+        "font": "Calibri",
+        "body_size": 11,
+        "name_size": 18,
+        "contact_size": 10,
+        "section_size": 12,
+        "margin_inches": 0.75,
+        "section_color": "0A66C2",  # LinkedIn blue
+    },
+}
+
+
+@dataclass(frozen=True)
+class PdfTemplate:
+    """PDF_TEMPLATES entry resolved once: fonts, sizes, margins, colours and derived metrics."""
+    name: str
+    body_font: str
+    bold_font: str
+    name_size: float
+    contact_size: float
+    section_size: float
+    subheading_size: float
+    body_size: float
+    line_spacing: float
+    margin_left: float
+    margin_right: float
+    margin_top: float
+    margin_bottom: float
+    section_color: object  # reportlab Color
+    colored_sections: bool
+    bullet_indent: float
+    bullet_width: float
+
+
+@dataclass(frozen=True)
+class DocxTemplate:
+    name: str
+    body_size: float
+    name_size: float
+    contact_size: float
+    section_size: float
+    section_color: object  # docx RGBColor or None
+    _base: object          # pre-styled empty document, built once; never mutated, only cloned
+
+    def new_document(self):
+        """Fresh copy of the pre-styled base (deep-copying the tree beats building and styling a new Document)."""
+        return copy.deepcopy(self._base)
+
+
+_pdf_registry = {}
+_docx_registry = {}
+_lock = threading.Lock()
+
+
+def template_name(name: str) -> str:
+    return name if name in PDF_TEMPLATES else DEFAULT_TEMPLATE
+
+
+def _build_pdf(name: str) -> PdfTemplate:
+    # reportlab is only imported when a PDF template is first needed
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    t = PDF_TEMPLATES[name]
+    return PdfTemplate(
+        name=name,
+        body_font=t["font"],
+        bold_font=t["header_font"],
+        name_size=t["name_size"],
+        contact_size=t["contact_size"],
+        section_size=t["section_size"],
+        subheading_size=t["subheading_size"],
+        body_size=t["body_size"],
+        line_spacing=t["line_spacing"],
+        margin_left=t["margin_left"],
+        margin_right=t["margin_right"],
+        margin_top=t["margin_top"],
+        margin_bottom=t["margin_bottom"],
+        section_color=colors.HexColor(t["section_color"]),
+        colored_sections=colors.HexColor(t["section_color"]) != colors.black,
+        bullet_indent=0.25 * inch,
+        bullet_width=stringWidth('- ', t["font"], t["body_size"]),  # Width of bullet prefix
+    )
+
+
+def _build_docx(name: str) -> DocxTemplate:
+    # python-docx is only imported when a DOCX template is first needed
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+
+    t = DOCX_TEMPLATES[name]
+    doc = Document()
+
+    # Set default style
+    default_style = doc.styles['Normal']
+    default_style.font.name = t["font"]
+    default_style.font.size = Pt(t["body_size"])
+
+    # Margins
+    section = doc.sections[0]
+    section.left_margin = Inches(t["margin_inches"])
+    section.right_margin = Inches(t["margin_inches"])
+    section.top_margin = Inches(t["margin_inches"])
+    section.bottom_margin = Inches(t["margin_inches"])
+
+    return DocxTemplate(
+        name=name,
+        body_size=t["body_size"],
+        name_size=t["name_size"],
+        contact_size=t["contact_size"],
+        section_size=t["section_size"],
+        section_color=RGBColor.from_string(t["section_color"]) if t["section_color"] else None,
+        _base=doc,
+    )
+
+
+def get_pdf_template(name: str) -> PdfTemplate:
+    """Resolved PDF template; built on first use, then shared (unknown names fall back to ATS_CLASSIC)."""
+    name = template_name(name)
+    tpl = _pdf_registry.get(name)
+    if tpl is None:
+        with _lock:
+            tpl = _pdf_registry.get(name) or _pdf_registry.setdefault(name, _build_pdf(name))
+    return tpl
+
+
+def get_docx_template(name: str) -> DocxTemplate:
+    """Resolved DOCX template with its pre-styled base document; built on first use, then shared."""
+    name = template_name(name)
+    tpl = _docx_registry.get(name)
+    if tpl is None:
+        with _lock:
+            tpl = _docx_registry.get(name) or _docx_registry.setdefault(name, _build_docx(name))
+    return tpl
+
+
+def warm_templates():
+    """Build every template up front (e.g. at startup)."""
+    for name in PDF_TEMPLATES:
+        get_pdf_template(name)
+        get_docx_template(name)
@@ -0,0 +1,126 @@
+# utils/text_analysis.py
+import hashlib
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from typing import FrozenSet, List, Mapping, Tuple, Union
+
+from cachetools import LRUCache
+
+# alignment_facts: simple + stable list
+ALIGNMENT_STOPWORDS = frozenset("""
+a an the and or but if then else for to of in on with by from as at is are was were be been being
+this that these those it its i you we they he she them our your my
+""".split())
+
+# ats_intelligence: expanded list for better noise reduction
+KEYWORD_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him himself
+his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up very was we were what when where which while who whom why will with would you your yours
+yourself yourselves
+""".split())
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+
+
+@lru_cache(maxsize=65536)
+def simple_stem(word: str) -> str:
+    """
+    Basic manual stemmer to handle common suffixes (inspired by Porter stemmer).
+    This reduces variations like 'developing' -> 'develop', 'developed' -> 'develop'.
+    Memoized: resumes and JDs repeat the same words constantly.
+    """
+    if word.endswith('ing'):
+        return word[:-3]
+    if word.endswith('ed'):
+        return word[:-2]
+    if word.endswith('es'):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+@dataclass(frozen=True)
+class TextAnalysis:
+    """
+    Everything the scorers need from one text, tokenized once.
+
+    - tokens/unigrams: alignment view (no stemming, alignment stopwords, len > 2)
+    - keyword_tokens/keywords/bigrams: ATS view (stemmed, expanded stopwords)
+    - counts: frequency of each alignment token
+
+    Only the alignment view is built up front (every request scores with
+    alignment_facts); the others are built from `normalized` on first use.
+    """
+    digest: str
+    normalized: str = field(repr=False)  # lowercased, punctuation replaced by spaces
+    tokens: Tuple[str, ...]
+    unigrams: FrozenSet[str]
+
+    @cached_property
+    def counts(self) -> Mapping[str, int]:
+        return MappingProxyType(Counter(self.tokens))
+
+    @cached_property
+    def keyword_tokens(self) -> Tuple[str, ...]:
+        # text is lowercased first, so the old 2-char acronym exception never fired
+        stems = map(simple_stem, (w for w in self.normalized.split() if w not in KEYWORD_STOPWORDS))
+        return tuple(s for s in stems if len(s) > 2)
+
+    @cached_property
+    def keywords(self) -> FrozenSet[str]:
+        return frozenset(self.keyword_tokens)
+
+    @cached_property
+    def bigrams(self) -> FrozenSet[str]:
+        kt = self.keyword_tokens
+        return frozenset(f"{kt[i]} {kt[i + 1]}" for i in range(len(kt) - 1))
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def _normalize(text: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", (text or "").lower())
+
+
+def _alignment_tokens(normalized: str) -> List[str]:
+    return [t for t in normalized.split() if len(t) > 2 and t not in ALIGNMENT_STOPWORDS]
+
+
+def alignment_tokens(text: str) -> List[str]:
+    """The alignment view of a text, tokenized directly (no hashing, never cached)."""
+    return _alignment_tokens(_normalize(text))
+
+
+def _analyze(text: str, digest: str) -> TextAnalysis:
+    normalized = _normalize(text)
+    tokens = _alignment_tokens(normalized)
+    return TextAnalysis(digest=digest, normalized=normalized, tokens=tuple(tokens), unigrams=frozenset(tokens))
+
+
+_cache = LRUCache(maxsize=1024)
+_lock = threading.Lock()
+
+
+def analyze(text: Union[str, TextAnalysis]) -> TextAnalysis:
+    """Analyze a text once; identical texts (same content hash) reuse the cached result."""
+    if isinstance(text, TextAnalysis):
+        return text
+    digest = text_digest(text)
+    with _lock:
+        cached = _cache.get(digest)
+    if cached is not None:
+        return cached
+    analysis = _analyze(text, digest)
+    with _lock:
+        _cache[digest] = analysis
+    return analysis
@@ -0,0 +1,88 @@
+# utils/upload.py
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import IO
+
+# Leading bytes each accepted format must start with (DOCX is a ZIP container).
+MAGIC = {
+    "pdf": b"%PDF-",
+    "docx": b"PK\x03\x04",
+}
+_SNIFF_BYTES = max(len(m) for m in MAGIC.values())
+
+
+class UploadError(ValueError):
+    """Upload rejected before parsing (too big, wrong type, content doesn't match extension)."""
+
+
+@dataclass
+class IngestedUpload:
+    filename: str
+    kind: str          # "pdf" or "docx"
+    stream: IO[bytes]  # seekable, positioned at 0; in memory below the spool threshold, on disk above
+    sha256: str
+    size: int
+
+    def read(self) -> bytes:
+        self.stream.seek(0)
+        data = self.stream.read()
+        self.stream.seek(0)
+        return data
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def upload_kind(filename: str) -> str:
+    name = (filename or "").lower()
+    for kind in MAGIC:
+        if name.endswith("." + kind):
+            return kind
+    raise UploadError("Unsupported file type. Upload PDF or DOCX.")
+
+
+def ingest_upload(file_storage, max_bytes: int, spool_threshold: int = 1024 * 1024, chunk_size: int = 64 * 1024) -> IngestedUpload:
+    """
+    Stream an upload in chunks: hash it on the way through, spool it
+    (memory below spool_threshold, temp file above), and reject oversize
+    or mismatched-magic files as early as possible, before any parser runs.
+    """
+    kind = upload_kind(file_storage.filename)
+    source = getattr(file_storage, "stream", file_storage)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadError(f"File too large (limit is {max_bytes // (1024 * 1024)} MB).")
+            if len(head) < _SNIFF_BYTES:
+                head += chunk[:_SNIFF_BYTES - len(head)]
+                if len(head) >= _SNIFF_BYTES and not head.startswith(MAGIC[kind]):
+                    raise UploadError(f"File content is not a valid {kind.upper()}.")
+            digest.update(chunk)
+            spool.write(chunk)
+
+        if size == 0:
+            raise UploadError("Uploaded file is empty.")
+        if not head.startswith(MAGIC[kind]):
+            raise UploadError(f"File content is not a valid {kind.upper()}.")
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return IngestedUpload(filename=file_storage.filename, kind=kind, stream=spool, sha256=digest.hexdigest(), size=size)
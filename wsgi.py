@@ -1,4 +1,16 @@
-from app import app
+import os
+import time
+
+_start = time.perf_counter()
+from app import app  # noqa: E402
+from utils import boot  # noqa: E402
+
+boot.report("import", time.perf_counter() - _start)
+
+# WARM_UP=1 with `gunicorn --preload wsgi:app`: build shared state once in the
+# master so the forked workers inherit it copy-on-write.
+if os.getenv("WARM_UP", "0") == "1":
+    boot.report("warm-up", boot.warm_up())
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    app.run()